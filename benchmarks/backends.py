@@ -0,0 +1,57 @@
+from __future__ import unicode_literals
+
+from prettypandas import PrettyPandas
+
+from .common import make_frame
+
+
+class FromDask(object):
+    """Summaries of a Dask DataFrame computed in one graph, against
+    computing the whole frame and summarizing it with pandas."""
+
+    params = [[100000, 1000000]]
+    param_names = ['rows']
+    timeout = 120
+
+    def setup(self, rows):
+        import dask.dataframe as dd
+
+        self.frame = dd.from_pandas(make_frame(rows, 10), npartitions=16)
+
+    def table(self, data):
+        return data.total().average().min().max()
+
+    def time_dask_summaries(self, rows):
+        self.table(PrettyPandas.from_dask(self.frame, scheduler='threads')
+                   )._apply_summaries()
+
+    def time_computed_frame(self, rows):
+        self.table(PrettyPandas(self.frame.compute(scheduler='threads'))
+                   )._apply_summaries()
+
+    def peakmem_dask_summaries(self, rows):
+        self.table(PrettyPandas.from_dask(self.frame, scheduler='threads')
+                   )._apply_summaries()
+
+
+class FromPolars(object):
+    """Summaries of a Polars DataFrame computed by one lazy select, against
+    converting the whole frame to pandas."""
+
+    params = [[100000, 1000000]]
+    param_names = ['rows']
+    timeout = 120
+
+    def setup(self, rows):
+        import polars as pl
+
+        self.frame = pl.from_pandas(make_frame(rows, 10))
+
+    def table(self, data):
+        return data.total().average().median().min().max()
+
+    def time_polars_summaries(self, rows):
+        self.table(PrettyPandas.from_polars(self.frame))._apply_summaries()
+
+    def time_converted_frame(self, rows):
+        self.table(PrettyPandas(self.frame.to_pandas()))._apply_summaries()
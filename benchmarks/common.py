@@ -0,0 +1,56 @@
+from __future__ import unicode_literals
+
+import numpy as np
+import pandas as pd
+
+from prettypandas.cache import LRUCache
+
+
+#: Number of data rows in each benchmarked frame.
+ROWS = [1000, 100000]
+
+#: Number of rows in frames that are rendered, which is far more expensive
+#: per cell than summarizing.
+RENDER_ROWS = [100, 10000]
+
+#: Number of data columns in each benchmarked frame.
+COLS = [5, 50]
+
+#: Column types: all floats, all integers, or alternating floats and
+#: integers, which produces a frame with several dtype blocks.
+DTYPES = ['float', 'int', 'mixed']
+
+#: Whether the columns are a two level MultiIndex.
+MULTIINDEX = [False, True]
+
+
+def make_frame(rows, cols, dtype='float', multiindex=False, seed=0):
+    """Build a reproducible frame of random values.
+
+    Float columns contain about 1% missing values so the NaN handling paths
+    of the summaries and formatters are exercised.
+    """
+    rng = np.random.RandomState(seed)
+
+    data = {}
+    for j in range(cols):
+        if dtype == 'int' or (dtype == 'mixed' and j % 2):
+            values = rng.randint(-1000, 1000, size=rows)
+        else:
+            values = rng.standard_normal(rows) * 1000
+            values[rng.random_sample(rows) < 0.01] = np.nan
+        data[j] = values
+
+    df = pd.DataFrame(data)
+    if multiindex:
+        df.columns = pd.MultiIndex.from_arrays(
+            [['group_{}'.format(j // 5) for j in range(cols)],
+             ['col_{}'.format(j) for j in range(cols)]])
+    else:
+        df.columns = ['col_{}'.format(j) for j in range(cols)]
+    return df
+
+
+def no_cache():
+    """Cache that stores nothing, so every call materializes the table."""
+    return LRUCache(maxsize=0)
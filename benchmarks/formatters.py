@@ -0,0 +1,43 @@
+from __future__ import unicode_literals
+
+import numpy as np
+
+from prettypandas.formatters import as_currency, as_percent, as_unit
+
+
+class Formatters(object):
+    """Formatting arrays of numbers to display strings."""
+
+    params = [[1000, 100000], ['currency', 'percent', 'unit']]
+    param_names = ['size', 'kind']
+
+    def setup(self, size, kind):
+        rng = np.random.RandomState(0)
+        self.values = rng.standard_normal(size) * 1e6
+        self.values[::100] = np.nan
+        self.scalars = self.values[:1000].tolist()
+
+        self.formatter = {
+            'currency': lambda: as_currency('USD', 'en_US'),
+            'percent': lambda: as_percent(2),
+            'unit': lambda: as_unit('km'),
+        }[kind]()
+
+    def time_format_array(self, size, kind):
+        self.formatter.format_array(self.values)
+
+    def peakmem_format_array(self, size, kind):
+        self.formatter.format_array(self.values)
+
+    def time_format_scalars(self, size, kind):
+        formatter = self.formatter
+        for value in self.scalars:
+            formatter(value)
+
+    def time_create(self, size, kind):
+        if kind == 'currency':
+            as_currency('EUR', 'de_DE')
+        elif kind == 'percent':
+            as_percent(3)
+        else:
+            as_unit('km', location='prefix')
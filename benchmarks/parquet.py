@@ -0,0 +1,42 @@
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+
+from prettypandas import PrettyPandas
+
+from .common import make_frame
+
+
+class FromParquet(object):
+    """Summaries of a Parquet file answered from row group statistics or by
+    streaming row groups, against reading the whole file with pandas."""
+
+    params = [[100000, 1000000]]
+    param_names = ['rows']
+    timeout = 120
+
+    def setup(self, rows):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'data.parquet')
+        make_frame(rows, 10).to_parquet(self.path, row_group_size=100000)
+        self.columns = ['col_0', 'col_1', 'col_2']
+
+    def teardown(self, rows):
+        shutil.rmtree(self.directory)
+
+    def time_metadata_min_max(self, rows):
+        (PrettyPandas.from_parquet(self.path, columns=self.columns,
+                                   summaries=['min', 'max'])
+         .min().max()._apply_summaries())
+
+    def time_streamed_total(self, rows):
+        (PrettyPandas.from_parquet(self.path, columns=self.columns,
+                                   summaries=['sum', 'mean'])
+         .total().average()._apply_summaries())
+
+    def peakmem_streamed_total(self, rows):
+        (PrettyPandas.from_parquet(self.path, columns=self.columns,
+                                   summaries=['sum', 'mean'])
+         .total().average()._apply_summaries())
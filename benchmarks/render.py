@@ -0,0 +1,122 @@
+from __future__ import unicode_literals
+
+import io
+
+from prettypandas import PrettyPandas
+from prettypandas.cache import html_cache
+
+from .common import COLS, DTYPES, MULTIINDEX, RENDER_ROWS, make_frame, \
+    no_cache
+
+
+def formatted_table(df):
+    first, last = df.columns[0], df.columns[-1]
+    return (
+        PrettyPandas(df, cache=no_cache())
+        .total()
+        .average(axis=1)
+        .as_currency(subset=[first])
+        .as_percent(subset=[last])
+    )
+
+
+class Render(object):
+    """Rendering summarized and formatted tables to HTML."""
+
+    params = [RENDER_ROWS, COLS, DTYPES, MULTIINDEX]
+    param_names = ['rows', 'cols', 'dtype', 'multiindex']
+    timeout = 300
+
+    def setup(self, rows, cols, dtype, multiindex):
+        df = make_frame(rows, cols, dtype, multiindex)
+        self.table = formatted_table(df)
+        self.plain = PrettyPandas(df, cache=no_cache())
+
+    def time_render(self, *params):
+        self.table.render()
+
+    def peakmem_render(self, *params):
+        self.table.render()
+
+    def time_render_plain(self, *params):
+        self.plain.render()
+
+    def time_render_page(self, *params):
+        self.table.render(page=0, page_size=50)
+
+
+class Style(object):
+    """Rendering the same tables through the pandas Styler."""
+
+    params = Render.params
+    param_names = Render.param_names
+    timeout = 300
+
+    def setup(self, rows, cols, dtype, multiindex):
+        self.table = formatted_table(
+            make_frame(rows, cols, dtype, multiindex))
+
+    def time_style(self, *params):
+        self.table.style.render()
+
+    def peakmem_style(self, *params):
+        self.table.style.render()
+
+
+class RenderCache(object):
+    """Serving unchanged tables from a render cache, where the data is
+    hashed on every new table."""
+
+    params = [RENDER_ROWS, COLS]
+    param_names = ['rows', 'cols']
+
+    def setup(self, rows, cols):
+        self.df = make_frame(rows, cols)
+        self.cache = html_cache()
+        self.table(self.df).render()
+
+    def table(self, df):
+        return PrettyPandas(df, render_cache=self.cache).total().as_percent()
+
+    def time_cached_render(self, rows, cols):
+        self.table(self.df).render()
+
+
+class ToExcel(object):
+    """Writing summarized and formatted tables to XLSX."""
+
+    params = [[10000, 100000], [10]]
+    param_names = ['rows', 'cols']
+    timeout = 300
+
+    def setup(self, rows, cols):
+        self.table = formatted_table(make_frame(rows, cols))
+
+    def time_to_excel(self, rows, cols):
+        self.table.to_excel(io.BytesIO())
+
+    def peakmem_to_excel(self, rows, cols):
+        self.table.to_excel(io.BytesIO())
+
+
+class Text(object):
+    """Rendering summarized and formatted tables to text formats."""
+
+    params = [RENDER_ROWS, COLS]
+    param_names = ['rows', 'cols']
+    timeout = 300
+
+    def setup(self, rows, cols):
+        self.table = formatted_table(make_frame(rows, cols))
+
+    def time_to_text(self, rows, cols):
+        self.table.to_text()
+
+    def time_to_markdown(self, rows, cols):
+        self.table.to_markdown()
+
+    def time_to_latex(self, rows, cols):
+        self.table.to_latex()
+
+    def time_to_string(self, rows, cols):
+        self.table.frame.to_string()
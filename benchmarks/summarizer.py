@@ -0,0 +1,111 @@
+from __future__ import unicode_literals
+
+import numpy as np
+import pandas as pd
+
+from prettypandas import PrettyPandas
+
+from .common import COLS, DTYPES, MULTIINDEX, ROWS, make_frame, no_cache
+
+
+class Summaries(object):
+    """Computing and assembling summary rows and columns."""
+
+    params = [ROWS, COLS, DTYPES, MULTIINDEX]
+    param_names = ['rows', 'cols', 'dtype', 'multiindex']
+
+    def setup(self, rows, cols, dtype, multiindex):
+        df = make_frame(rows, cols, dtype, multiindex)
+        table = PrettyPandas(df, cache=no_cache())
+
+        self.builtin_rows = table.total().average().min().max()
+        self.builtin_both = table.total().average(axis=1)
+        self.custom_rows = table.summary(lambda s: s.abs().sum(), 'Custom')
+
+    def time_builtin_rows(self, *params):
+        self.builtin_rows._apply_summaries()
+
+    def peakmem_builtin_rows(self, *params):
+        self.builtin_rows._apply_summaries()
+
+    def time_rows_and_cols(self, *params):
+        self.builtin_both._apply_summaries()
+
+    def peakmem_rows_and_cols(self, *params):
+        self.builtin_both._apply_summaries()
+
+    def time_custom_rows(self, *params):
+        self.custom_rows._apply_summaries()
+
+
+class WideMixed(object):
+    """Summaries of wide frames where some columns hold strings, which are
+    left out of numeric reductions."""
+
+    params = [[500, 2000]]
+    param_names = ['cols']
+
+    def setup(self, cols):
+        df = make_frame(10000, cols)
+        for label in df.columns[::4]:
+            df[label] = df[label].astype(str)
+        self.table = PrettyPandas(df, cache=no_cache()).total().average()
+
+    def time_numeric_rows(self, cols):
+        self.table._apply_summaries()
+
+    def peakmem_numeric_rows(self, cols):
+        self.table._apply_summaries()
+
+
+class Subtotals(object):
+    """Subtotals over a three level MultiIndex with many groups."""
+
+    params = [[100000, 1000000], [100, 100000]]
+    param_names = ['rows', 'groups']
+    timeout = 120
+
+    def setup(self, rows, groups):
+        rng = np.random.RandomState(0)
+        df = make_frame(rows, 5)
+        df.index = pd.MultiIndex.from_arrays([
+            np.sort(rng.randint(0, groups, rows)),
+            rng.randint(0, 5, rows),
+            np.arange(rows),
+        ])
+        self.table = PrettyPandas(df.sort_index(), cache=no_cache())
+
+    def time_subtotal_one_level(self, rows, groups):
+        self.table.subtotal(level=0).total()._apply_summaries()
+
+    def time_subtotal_two_levels(self, rows, groups):
+        self.table.subtotal(level=[0, 1]).total()._apply_summaries()
+
+    def peakmem_subtotal_two_levels(self, rows, groups):
+        self.table.subtotal(level=[0, 1]).total()._apply_summaries()
+
+
+class Chaining(object):
+    """Overhead of building a table through chained calls, which copy the
+    table on every step."""
+
+    params = [[1, 10, 100]]
+    param_names = ['steps']
+
+    def setup(self, steps):
+        self.table = PrettyPandas(make_frame(10, 5))
+
+    def time_summary_chain(self, steps):
+        table = self.table
+        for i in range(steps):
+            table = table.summary('sum', 'Total {}'.format(i))
+
+    def time_formatter_chain(self, steps):
+        table = self.table
+        for i in range(steps):
+            table = table.as_percent(subset=['col_0'])
+
+    def time_copy(self, steps):
+        table = self.table.total().as_currency()
+        for _ in range(steps):
+            table._copy()
@@ -1,3 +1,5 @@
+__version__ = '0.0.4'
+
 from .summarizer import PrettyPandas
 from .formatters import as_currency, as_percent, as_unit
 
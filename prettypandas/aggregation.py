@@ -0,0 +1,442 @@
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+from concurrent.futures import (Executor, ProcessPoolExecutor,
+                                ThreadPoolExecutor)
+from contextlib import contextmanager
+import os
+
+import numpy as np
+import pandas as pd
+
+from .profiling import stage
+
+
+#: Reductions that can be computed together from a single NumPy array.
+FUSED_REDUCTIONS = frozenset(['sum', 'mean', 'min', 'max'])
+
+#: Reductions that need numbers. Aggregates using them are only applied to
+#: numeric columns unless a subset names the columns; other reductions and
+#: functions are applied to every column.
+NUMERIC_REDUCTIONS = frozenset(['sum', 'mean', 'median', 'var', 'std'])
+
+#: Executor names accepted by PrettyPandas and the pools they create.
+EXECUTORS = {
+    'thread': ThreadPoolExecutor,
+    'process': ProcessPoolExecutor,
+}
+
+
+def _axis_is_rows(axis):
+    return axis == 0 or axis == 'rows'
+
+
+def _subset_key(subset):
+    """Hashable key identifying an aggregate subset, or raise TypeError."""
+    if subset is None:
+        return None
+    if isinstance(subset, list):
+        return ('list', tuple(subset))
+    hash(subset)
+    return subset
+
+
+def _is_fusable(frame, axis):
+    """Check whether frame can be reduced directly on its NumPy values.
+
+    Reductions over rows are only fused when every column has the same
+    dtype, so integers are never reduced as floats. Reductions over columns
+    mix the dtypes of a row, and are reduced as floats like pandas does.
+    """
+    if frame.shape[0] == 0 or frame.shape[1] == 0:
+        return False
+
+    dtypes = set(frame.dtypes)
+    return all(
+        isinstance(dtype, np.dtype) and dtype.kind in 'biuf'
+        for dtype in dtypes
+    ) and (len(dtypes) == 1 or not _axis_is_rows(axis))
+
+
+def _dtype_groups(frame):
+    """Positions of the columns of frame grouped by dtype, in order of
+    first appearance"""
+    groups = OrderedDict()
+    for j, dtype in enumerate(frame.dtypes):
+        groups.setdefault(dtype, []).append(j)
+    return list(groups.values())
+
+
+def _concat_series(pieces):
+    """Concatenate Series, as objects if their dtypes differ so no value is
+    converted to another type"""
+    if len(set(piece.dtype for piece in pieces)) > 1:
+        pieces = [piece.astype(object) for piece in pieces]
+    return pd.concat(pieces)
+
+
+def _line_sums(values, np_axis):
+    """Sums of values along np_axis.
+
+    Every line is summed as a contiguous row, so its sum only depends on
+    its own values and not on the shape or layout of the block it is part
+    of, and reductions split across workers match serial ones exactly.
+    """
+    lines = values.T if np_axis == 0 else values
+    return np.ascontiguousarray(lines).sum(axis=1)
+
+
+def _fused_reduce(frame, funcs, axis):
+    """Compute sum, mean, min and max from one extraction of the values.
+
+    ``sum`` and ``mean`` share a single sum and count; ``min`` and ``max``
+    use ``fmin``/``fmax`` which skip NaN the same way pandas does.
+    """
+    np_axis = 0 if _axis_is_rows(axis) else 1
+    labels = frame.columns if np_axis == 0 else frame.index
+    if len(set(frame.dtypes)) > 1:
+        values = frame.to_numpy(dtype='float64')
+    else:
+        values = frame.values
+
+    results = {}
+    if 'sum' in funcs or 'mean' in funcs:
+        total = _line_sums(values, np_axis)
+        count = np.full(total.shape, values.shape[np_axis], dtype='int64')
+
+        # Only lines containing NaN have a NaN sum, so only those are
+        # masked and summed again.
+        if values.dtype.kind == 'f':
+            bad = np.flatnonzero(np.isnan(total))
+            if len(bad):
+                part = values.take(bad, axis=1 - np_axis)
+                missing = np.isnan(part)
+                total[bad] = _line_sums(np.where(missing, 0, part), np_axis)
+                count[bad] = part.shape[np_axis] - missing.sum(axis=np_axis)
+
+        if 'sum' in funcs:
+            results['sum'] = total
+        if 'mean' in funcs:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                results['mean'] = total / np.asarray(count, dtype='float64')
+
+    if 'min' in funcs:
+        results['min'] = np.fmin.reduce(values, axis=np_axis)
+    if 'max' in funcs:
+        results['max'] = np.fmax.reduce(values, axis=np_axis)
+
+    return {name: pd.Series(result, index=labels)
+            for name, result in results.items()}
+
+
+def reduce_frame(frame, funcs, axis=0):
+    """Compute several named reductions over a frame in as few passes as
+    possible.
+
+    :param frame: DataFrame to reduce.
+    :param funcs: Iterable of reduction names understood by ``DataFrame.agg``.
+    :param axis: Pandas axis to reduce over.
+    :returns: dict mapping each name to a Series.
+    """
+    funcs = list(OrderedDict.fromkeys(funcs))
+    results = {}
+
+    groups = _dtype_groups(frame)
+    if _axis_is_rows(axis) and len(groups) > 1:
+        # Columns are reduced one dtype at a time, then put back in order.
+        order = np.argsort(np.concatenate(groups), kind='stable')
+        parts = [reduce_frame(frame.iloc[:, group], funcs, axis)
+                 for group in groups]
+        return {name: _concat_series([part[name] for part in parts])
+                .iloc[order]
+                for name in funcs}
+
+    if _is_fusable(frame, axis):
+        fused = [f for f in funcs if f in FUSED_REDUCTIONS]
+        if fused:
+            results.update(_fused_reduce(frame, fused, axis))
+
+        remaining = [f for f in funcs if f not in results]
+        if remaining:
+            table = frame.agg(remaining, axis=axis)
+            for name in remaining:
+                if _axis_is_rows(axis):
+                    results[name] = table.loc[name]
+                else:
+                    results[name] = table[name]
+    else:
+        for name in funcs:
+            results[name] = frame.agg(name, axis=axis)
+
+    return results
+
+
+def check_executor(executor):
+    """Raise ValueError if executor is not a valid executor argument"""
+    if executor is None or isinstance(executor, Executor):
+        return executor
+    if executor in EXECUTORS:
+        return executor
+    raise ValueError(
+        "executor must be an Executor, None, or one of: {}.".format(
+            ', '.join(sorted(EXECUTORS)))
+    )
+
+
+@contextmanager
+def executor_scope(executor):
+    """Yield an Executor for executor, creating and shutting down a pool
+    when executor is given by name."""
+    check_executor(executor)
+    if executor is None or isinstance(executor, Executor):
+        yield executor
+    else:
+        with EXECUTORS[executor]() as pool:
+            yield pool
+
+
+def _worker_count(executor):
+    return getattr(executor, '_max_workers', None) or os.cpu_count() or 1
+
+
+class _Immediate(object):
+    """Already computed result with the interface of a Future."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def result(self):
+        return self.value
+
+
+class _Blocks(object):
+    """Combine the results of reductions over blocks of a frame."""
+
+    def __init__(self, futures):
+        self.futures = futures
+
+    def result(self):
+        return _combine_reduced([f.result() for f in self.futures])
+
+
+def _submit(executor, fn, *args):
+    if executor is None:
+        return _Immediate(fn(*args))
+    return executor.submit(fn, *args)
+
+
+def _split(frame, axis, parts):
+    """Split frame into blocks of whole columns for a reduction over rows,
+    or blocks of whole rows for a reduction over columns."""
+    if parts <= 1:
+        return [frame]
+
+    if _axis_is_rows(axis):
+        length, take = frame.shape[1], lambda ix: frame.iloc[:, ix]
+    else:
+        length, take = frame.shape[0], lambda ix: frame.iloc[ix]
+
+    parts = max(1, min(parts, length))
+    return [take(ix) for ix in np.array_split(np.arange(length), parts)]
+
+
+def _combine_reduced(blocks):
+    if len(blocks) == 1:
+        return blocks[0]
+    return {name: _concat_series([block[name] for block in blocks])
+            for name in blocks[0]}
+
+
+def _combine_series(blocks):
+    if len(blocks) == 1:
+        return blocks[0]
+    return _concat_series(blocks)
+
+
+def apply_aggregates(df, aggregates, stats=None, executor=None):
+    """Evaluate a list of Aggregates over df, batching where possible.
+
+    Aggregates that use a named reduction with no extra arguments are grouped
+    by subset and evaluated together with :func:`reduce_frame`. All other
+    aggregates are evaluated individually.
+
+    When an executor is given, independent aggregates are evaluated
+    concurrently and each one is split into blocks of whole columns (or whole
+    rows for summary columns), one per worker. Every cell is still computed
+    by exactly one call, and sums of each line do not depend on the block
+    holding it, so results do not depend on scheduling or on the number of
+    workers and are returned in the original order. Process pools require
+    picklable functions.
+
+    :param df: DataFrame to summarize.
+    :param aggregates: List of Aggregate objects sharing the same axis.
+    :param stats:
+        Optional :py:class:`ColumnStats <prettypandas.streaming.ColumnStats>`
+        or :py:class:`DaskStats <prettypandas.backends.DaskStats>` for the
+        data. Summary rows are computed from ``stats`` where
+        possible. If ``stats`` describes more rows than ``df`` holds, every
+        summary row must be computable from ``stats``; otherwise reductions
+        the statistics cannot answer exactly for every column are computed
+        from ``df``.
+    :param executor: Optional ``concurrent.futures.Executor``.
+    :returns: List of Series in the same order as ``aggregates``.
+    """
+    if stats is not None and hasattr(stats, 'prefetch'):
+        # Lazy statistics compute every reduction needed in one pass.
+        stats.prefetch([agg.func for agg in aggregates
+                        if agg.is_named_reduction and
+                        _axis_is_rows(agg.axis)])
+
+    partial = stats is not None and stats.rows != len(df)
+    parts = 1 if executor is None else _worker_count(executor)
+    pending = [None] * len(aggregates)
+    groups = OrderedDict()
+
+    for position, agg in enumerate(aggregates):
+        if not agg.is_named_reduction:
+            if partial and _axis_is_rows(agg.axis):
+                raise ValueError(
+                    "Summary '{}' needs the full data, but the table only "
+                    "holds the first rows; use a built-in reduction such as "
+                    "'sum' or 'mean' instead.".format(agg.title)
+                )
+            with stage('aggregate:{}'.format(agg.title)):
+                blocks = _split(agg.select(df), agg.axis, parts)
+                pending[position] = (
+                    _combine_series,
+                    [_submit(executor, agg.reduce, block)
+                     for block in blocks],
+                )
+            continue
+
+        try:
+            key = (_subset_key(agg.subset), _subset_key(agg.columns),
+                   agg.axis)
+        except TypeError:
+            key = (id(agg), agg.axis)
+
+        groups.setdefault(key, []).append(position)
+
+    reductions = []
+    for positions in groups.values():
+        first = aggregates[positions[0]]
+        frame = first.select(df)
+        funcs = [aggregates[p].func for p in positions]
+
+        futures = []
+        if stats is not None and _axis_is_rows(first.axis):
+            if partial:
+                known = funcs
+            else:
+                known = [f for f in funcs if f in stats.exact_reductions and
+                         stats.covers(f, frame.columns)]
+            if known:
+                futures.append(_Immediate(
+                    stats.reduce(known, columns=frame.columns)))
+            funcs = [f for f in funcs if f not in known]
+
+        if funcs:
+            with stage('reduce:{}'.format(','.join(funcs))):
+                blocks = [_submit(executor, reduce_frame, block, funcs,
+                                  first.axis)
+                          for block in _split(frame, first.axis, parts)]
+            futures.append(_Blocks(blocks))
+        reductions.append((positions, futures))
+
+    results = [None] * len(aggregates)
+    for position, item in enumerate(pending):
+        if item is not None:
+            combine, futures = item
+            results[position] = combine([f.result() for f in futures])
+
+    for positions, futures in reductions:
+        reduced = {}
+        for future in futures:
+            reduced.update(future.result())
+        for position in positions:
+            agg = aggregates[position]
+            result = reduced[agg.func].copy()
+            result.name = agg.title
+            results[position] = result
+
+    return results
+
+
+def _level_number(index, level):
+    if isinstance(level, int):
+        return level if level >= 0 else index.nlevels + level
+    return list(index.names).index(level)
+
+
+def _last_positions(ids, ngroups):
+    """Position of the last row of each group, given the group number of
+    every row. Rows numbered -1 belong to no group."""
+    last = np.full(ngroups, -1, dtype='int64')
+    numbers, first = np.unique(ids[::-1], return_index=True)
+    found = numbers >= 0
+    last[numbers[found]] = len(ids) - 1 - first[found]
+    return last
+
+
+def apply_subtotals(df, subtotals):
+    """Evaluate a list of Subtotals over the levels of a MultiIndex.
+
+    Subtotals on the same level share one ``groupby`` over that level and
+    every level above it, so each level is grouped once no matter how many
+    groups or subtotals it has. Groups are kept in order of first appearance
+    and rows with a missing key are not subtotalled.
+
+    :param df: DataFrame with a MultiIndex.
+    :param subtotals: List of Subtotal objects.
+    :returns: List of ``(frame, positions)`` tuples in the same order as
+        ``subtotals``. ``frame`` has one row per group, labelled with the
+        group keys followed by the subtotal title, and ``positions`` holds
+        the position in ``df`` of the last row of each group.
+    """
+    index = df.index
+    nlevels = index.nlevels
+
+    levels = OrderedDict()
+    for position, sub in enumerate(subtotals):
+        try:
+            level = _level_number(index, sub.level)
+        except ValueError:
+            raise ValueError("Unknown index level {!r}.".format(sub.level))
+
+        if not 0 <= level < nlevels - 1:
+            raise ValueError(
+                "Subtotals need a MultiIndex level other than the last "
+                "one, got level {!r}.".format(sub.level)
+            )
+        levels.setdefault(level, []).append(position)
+
+    results = [None] * len(subtotals)
+    for level, positions in levels.items():
+        with stage('subtotal:level {}'.format(level)):
+            grouped = df.groupby(level=list(range(level + 1)), sort=False)
+            ids = grouped.ngroup().values
+            if ids.dtype.kind == 'f':
+                ids = np.where(np.isnan(ids), -1, ids)
+            last = _last_positions(ids.astype('int64'), grouped.ngroups)
+
+            for position in positions:
+                sub = subtotals[position]
+                if sub.subset:
+                    reduced = grouped[sub.subset].agg(sub.func, *sub.args,
+                                                      **sub.kwargs)
+                else:
+                    reduced = grouped.agg(sub.func, *sub.args, **sub.kwargs)
+                reduced = reduced.reindex(columns=df.columns)
+
+                keys = reduced.index
+                size = len(keys)
+                arrays = [keys.get_level_values(i) for i in range(level + 1)]
+                arrays.append(np.full(size, sub.title, dtype=object))
+                arrays.extend(np.full(size, '', dtype=object)
+                              for _ in range(nlevels - level - 2))
+                reduced.index = pd.MultiIndex.from_arrays(arrays,
+                                                          names=index.names)
+
+                results[position] = (reduced, last)
+
+    return results
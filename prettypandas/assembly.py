@@ -0,0 +1,333 @@
+from __future__ import unicode_literals
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .dtypes import float_dtype, is_nullable_numeric, numeric_kind
+
+
+#: Data and summaries of a table kept as separate frames.
+SummaryView = namedtuple('SummaryView', ['data', 'rows', 'cols'])
+
+
+def _is_numpy(dtype):
+    return isinstance(dtype, np.dtype)
+
+
+def _common_dtype(left, right):
+    """dtype able to hold values of both dtypes, or None to let pandas
+    decide for other extension dtypes.
+
+    Nullable and Arrow numeric dtypes are kept, widening integers to the
+    float dtype of the same family."""
+    if left == right:
+        return left
+    if is_nullable_numeric(left) and is_nullable_numeric(right):
+        return float_dtype(left)
+    if not (_is_numpy(left) and _is_numpy(right)):
+        return None
+    if left.kind in 'iuf' and right.kind in 'iuf':
+        return np.result_type(left, right)
+    return np.dtype(object)
+
+
+def _with_missing(dtype):
+    """dtype able to hold dtype values and NaN."""
+    if is_nullable_numeric(dtype):
+        return dtype
+    if not _is_numpy(dtype):
+        return None
+    if dtype.kind in 'iu':
+        return np.dtype('float64')
+    if dtype.kind in 'fcOmM':
+        return dtype
+    return np.dtype(object)
+
+
+def _is_integral(values):
+    return (values.dtype.kind == 'f' and len(values) and
+            np.isfinite(values).all() and
+            (values == np.round(values)).all())
+
+
+def _as_floats(values):
+    """Object array of numbers and missing values as float64, or None if
+    some value is not a number"""
+    try:
+        numbers = pd.to_numeric(pd.Series(values, dtype=object))
+    except (TypeError, ValueError):
+        return None
+    return numbers.to_numpy(dtype='float64', na_value=np.nan)
+
+
+def _summary_column(values, dtype):
+    """Array of summary values for one column, matching the data dtype
+    where the values allow it.
+
+    Summaries of nullable and Arrow numeric columns are built directly as
+    arrays of the same family, with missing values as NA, so they are never
+    converted to objects."""
+    values = pd.Series(values).values
+    if is_nullable_numeric(dtype) and values.dtype.kind == 'O':
+        floats = _as_floats(values)
+        if floats is not None:
+            values = floats
+    if _is_numpy(dtype) and dtype.kind in 'mM' and pd.isna(values).all():
+        return np.full(len(values), 'NaT', dtype=dtype)
+    if not _is_numpy(dtype) and dtype is not None and \
+            pd.isna(values).all():
+        try:
+            return pd.array([None] * len(values), dtype=dtype)
+        except (TypeError, ValueError):
+            return values
+    if is_nullable_numeric(dtype) and values.dtype.kind in 'iuf':
+        if values.dtype.kind == 'f' and numeric_kind(dtype) in 'iu':
+            present = values[~np.isnan(values)]
+            if len(present) and not _is_integral(present):
+                dtype = float_dtype(dtype)
+        return pd.Series(values).astype(dtype).array
+    if (_is_numpy(dtype) and dtype.kind in 'iu' and
+            _is_integral(values)):
+        return values.astype(dtype)
+    return values
+
+
+def summary_rows_frame(summaries, columns, dtypes=None):
+    """Build a frame with one row per summary Series.
+
+    Values are gathered column by column instead of concatenating and
+    transposing, so each column keeps its own dtype. Integer summaries of
+    integer columns, such as totals, stay integers.
+
+    :param summaries: List of Series indexed by column label.
+    :param columns: Column labels of the data.
+    :param dtypes: Optional data dtypes used to restore integer columns.
+    :returns: DataFrame indexed by summary title.
+    """
+    aligned = [s.reindex(columns).values for s in summaries]
+    titles = [s.name for s in summaries]
+
+    if dtypes is None:
+        dtypes = [None] * len(columns)
+
+    data = {}
+    for j, dtype in enumerate(dtypes):
+        data[j] = _summary_column([a[j] for a in aligned], dtype)
+
+    frame = pd.DataFrame(data, index=pd.Index(titles))
+    frame.columns = columns
+    return frame
+
+
+def _summary_cols_dtype(dtypes):
+    """dtype of summary columns over data of dtypes: the common nullable or
+    Arrow dtype when the data holds such numeric columns, otherwise None"""
+    common = None
+    for dtype in dtypes:
+        if not is_nullable_numeric(dtype):
+            continue
+        common = dtype if common is None else _common_dtype(common, dtype)
+    return common
+
+
+def summary_cols_frame(summaries, index, dtypes=None):
+    """Build a frame with one column per summary Series, aligned to index.
+
+    :param summaries: List of Series indexed like the data.
+    :param index: Index of the data.
+    :param dtypes: Optional data dtypes. Summaries over nullable or Arrow
+        numeric columns are built as arrays of the same family.
+    :returns: DataFrame indexed by index.
+    """
+    dtype = None if dtypes is None else _summary_cols_dtype(dtypes)
+
+    data = {}
+    for j, summary in enumerate(summaries):
+        values = summary.values if summary.index.equals(index) \
+            else summary.reindex(index).values
+        data[j] = values if dtype is None else _summary_column(values, dtype)
+
+    frame = pd.DataFrame(data, index=index)
+    frame.columns = pd.Index([s.name for s in summaries])
+    return frame
+
+
+def interleave_rows(data, blocks):
+    """Insert blocks of rows into data at precomputed positions.
+
+    Every row of a block is placed directly after a row of ``data``. Rows
+    placed after the same data row keep the order of ``blocks``. The final
+    order is computed with a single sort of positions, so the cost does not
+    depend on the number of blocks or groups.
+
+    :param data: DataFrame of data.
+    :param blocks: List of ``(frame, positions)`` tuples, where positions
+        holds, for every row of frame, the position of the data row it
+        follows.
+    :returns: Tuple of the combined DataFrame and a boolean array marking
+        the inserted rows.
+    """
+    if not blocks:
+        return data, np.zeros(len(data), dtype=bool)
+
+    after = [np.arange(len(data))]
+    rank = [np.zeros(len(data), dtype='int64')]
+    for i, (frame, positions) in enumerate(blocks):
+        after.append(np.asarray(positions, dtype='int64'))
+        rank.append(np.full(len(frame), i + 1, dtype='int64'))
+
+    after = np.concatenate(after)
+    rank = np.concatenate(rank)
+    order = np.lexsort((rank, after))
+
+    frames = [data] + [frame for frame, _ in blocks]
+    combined = pd.concat(frames, axis=0, ignore_index=True)
+    combined.index = _append_index(data.index, *[f.index for f in frames[1:]])
+    return combined.take(order), (rank > 0)[order]
+
+
+def _append_multiindex(index, others):
+    """Append MultiIndexes by extending the levels and codes of index.
+
+    ``MultiIndex.append`` rebuilds and sorts every level, which is slow
+    when labels such as summary titles are mixed into numeric levels.
+    """
+    levels, codes = [], []
+    for i in range(index.nlevels):
+        level = index.levels[i]
+        level_codes = [index.codes[i]]
+        added = pd.Index([], dtype=object)
+
+        # Only the distinct labels of each index are looked up; the codes
+        # of every row are then translated with a single take.
+        for other in others:
+            labels = other.levels[i]
+            mapping = level.get_indexer(labels)
+            missing = mapping < 0
+            if missing.any():
+                new = pd.Index(np.asarray(labels[missing], dtype=object),
+                               dtype=object)
+                mapping[missing] = added.get_indexer(new)
+                unseen = missing & (mapping < 0)
+                if unseen.any():
+                    mapping[unseen] = len(added) + np.arange(unseen.sum())
+                    added = added.append(
+                        pd.Index(np.asarray(labels[unseen], dtype=object),
+                                 dtype=object))
+                mapping[missing] += len(level)
+
+            other_codes = np.asarray(other.codes[i], dtype='int64')
+            level_codes.append(np.where(other_codes < 0, -1,
+                                        mapping.take(other_codes)))
+
+        if len(added):
+            level = pd.Index(np.concatenate([np.asarray(level, dtype=object),
+                                             np.asarray(added)]),
+                             dtype=object, name=level.name)
+        levels.append(level)
+        codes.append(np.concatenate(level_codes))
+
+    return pd.MultiIndex(levels=levels, codes=codes, names=index.names,
+                         verify_integrity=False)
+
+
+def _append_index(index, *others):
+    """Append indexes without inferring the dtype of every label."""
+    if isinstance(index, pd.MultiIndex) and all(
+            isinstance(other, pd.MultiIndex) and
+            other.nlevels == index.nlevels for other in others):
+        return _append_multiindex(index, others)
+
+    if isinstance(index, pd.MultiIndex) or all(
+            index.dtype == other.dtype and index.dtype != object
+            for other in others):
+        return index.append(list(others))
+
+    values = np.concatenate([index.astype(object)] +
+                            [other.astype(object) for other in others])
+    return pd.Index(values, dtype=object, name=index.name)
+
+
+def _column_dtypes(data, rows, cols):
+    dtypes = []
+    for j, dtype in enumerate(data.dtypes):
+        if rows is not None:
+            dtype = _common_dtype(dtype, rows.dtypes.iloc[j])
+        dtypes.append(dtype)
+
+    for dtype in (cols.dtypes if cols is not None else []):
+        if rows is not None:
+            dtype = _with_missing(dtype)
+        dtypes.append(dtype)
+    return dtypes
+
+
+def assemble(data, rows=None, cols=None):
+    """Combine data, summary rows and summary columns into one frame.
+
+    The output is allocated once and every part is written into it
+    directly. When all columns share a NumPy dtype a single 2D block is
+    filled, so the data is copied exactly once. Otherwise each output column
+    is allocated with the narrowest dtype that holds both its data and its
+    summary values.
+
+    :param data: DataFrame of data.
+    :param rows: Optional frame from :func:`summary_rows_frame`.
+    :param cols: Optional frame from :func:`summary_cols_frame`.
+    :returns: DataFrame.
+    """
+    if rows is None and cols is None:
+        return data
+
+    n, m = data.shape
+    k = 0 if rows is None else len(rows)
+    q = 0 if cols is None else cols.shape[1]
+
+    index = data.index if rows is None else \
+        _append_index(data.index, rows.index)
+    columns = data.columns if cols is None else \
+        _append_index(data.columns, cols.columns)
+
+    dtypes = _column_dtypes(data, rows, cols)
+    unique = set(dtypes)
+
+    if len(unique) == 1 and all(_is_numpy(dtype) for dtype in unique):
+        dtype = unique.pop()
+        out = np.empty((m + q, n + k), dtype=dtype).T
+        out[:n, :m] = data.values
+        if rows is not None:
+            out[n:, :m] = rows.values
+        if cols is not None:
+            out[:n, m:] = cols.values
+            if rows is not None:
+                out[n:, m:] = np.nan
+        return pd.DataFrame(out, index=index, columns=columns, copy=False)
+
+    arrays = {}
+    for j, dtype in enumerate(dtypes):
+        if j < m:
+            head = data.iloc[:, j]
+            tail = None if rows is None else rows.iloc[:, j]
+        else:
+            head = cols.iloc[:, j - m]
+            tail = None if rows is None else \
+                pd.Series(np.nan, index=rows.index)
+
+        if tail is None:
+            arrays[j] = head.values
+        elif dtype is None:
+            arrays[j] = pd.concat([head, tail], ignore_index=True).array
+        elif not _is_numpy(dtype):
+            arrays[j] = pd.concat([head.astype(dtype), tail.astype(dtype)],
+                                  ignore_index=True).array
+        else:
+            column = np.empty(n + k, dtype=dtype)
+            column[:n] = head.values
+            column[n:] = tail.values
+            arrays[j] = column
+
+    frame = pd.DataFrame(arrays, index=index)
+    frame.columns = columns
+    return frame
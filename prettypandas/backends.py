@@ -0,0 +1,242 @@
+from __future__ import unicode_literals
+
+import pandas as pd
+
+from .dtypes import is_numeric
+from .streaming import STREAMING_REDUCTIONS
+
+
+def is_dask_frame(data):
+    """Check whether data is a ``dask.dataframe.DataFrame``, without
+    importing Dask"""
+    return (type(data).__module__.startswith('dask.') and
+            hasattr(data, 'npartitions') and hasattr(data, 'columns'))
+
+
+class LazyStats(object):
+    """LazyStats
+
+    Base class for statistics of a frame held by another library, with the
+    interface of :py:class:`ColumnStats <prettypandas.streaming.ColumnStats>`
+    so the summary rows of a table holding only the head of the frame are
+    computed over all of it.
+
+    Nothing is computed until summaries are needed. Every reduction the
+    summaries need, along with the number of rows, is then computed in one
+    pass by :py:meth:`_compute`. Results are kept for later reductions.
+    """
+
+    #: Reductions answered from the full frame.
+    exact_reductions = STREAMING_REDUCTIONS
+
+    #: Name of the library in error messages.
+    source = None
+
+    def __init__(self, columns):
+        self.columns = pd.Index(columns)
+        self.numeric = []
+        self.sketch_size = None
+
+        self._rows = None
+        self._results = {}
+
+    @property
+    def rows(self):
+        """Number of rows of the frame, computed on first use"""
+        if self._rows is None:
+            self.prefetch(())
+        return self._rows
+
+    def _compute(self, funcs, rows):
+        """Compute the reductions funcs over the numeric columns, or
+        ``count`` over every column, and the number of rows if rows is True.
+
+        :returns: Tuple of the number of rows, or None, and a dict mapping
+            each name of funcs to a Series.
+        """
+        raise NotImplementedError
+
+    def prefetch(self, funcs):
+        """Compute every reduction of funcs that is not known yet, and the
+        number of rows, in one pass"""
+        funcs = [f for f in dict.fromkeys(funcs)
+                 if f in self.exact_reductions and f not in self._results]
+        if self._rows is not None and not funcs:
+            return self
+
+        rows, results = self._compute(funcs, self._rows is None)
+        if rows is not None:
+            self._rows = int(rows)
+        self._results.update(results)
+        return self
+
+    def covers(self, name, columns):
+        """Check whether reduction name is computed for every column of
+        columns"""
+        known = self.columns if name == 'count' else self.numeric
+        return bool(pd.Index(columns).isin(known).all())
+
+    def reduce(self, funcs, columns=None):
+        """Compute named reductions over the whole frame.
+
+        :param funcs: Iterable of names in ``STREAMING_REDUCTIONS``.
+        :param columns: Columns to report. Defaults to every column.
+        :returns: dict mapping each name to a Series.
+        """
+        if columns is None:
+            columns = self.columns
+
+        unsupported = set(funcs) - self.exact_reductions
+        if unsupported:
+            raise ValueError(
+                "Cannot compute {} from a {} DataFrame.".format(
+                    ', '.join(sorted(unsupported)), self.source)
+            )
+
+        self.prefetch(funcs)
+        return {name: self._results[name].reindex(columns)
+                for name in funcs}
+
+    def copy(self):
+        raise TypeError(
+            "Rows cannot be appended to a table built from a {} "
+            "DataFrame; build a new table from the extended frame.".format(
+                self.source))
+
+
+class DaskStats(LazyStats):
+    """DaskStats
+
+    Statistics of a Dask DataFrame. Reductions and the number of rows are
+    computed with a single ``dask.compute``, so partitions are read once and
+    shared by every reduction. ``median`` uses Dask's approximate quantiles.
+
+    :param frame: Dask DataFrame.
+    :param scheduler: Scheduler passed to ``dask.compute``, e.g.
+        ``'threads'``. Defaults to the active client or Dask's default.
+    """
+
+    source = 'Dask'
+
+    def __init__(self, frame, scheduler=None):
+        super(DaskStats, self).__init__(frame.columns)
+        self.frame = frame
+        self.scheduler = scheduler
+        self.numeric = [name for name, dtype in frame.dtypes.items()
+                        if is_numeric(dtype)]
+
+    def _compute(self, funcs, rows):
+        import dask
+
+        numeric = self.frame[self.numeric]
+        graphs = [self.frame.index.size if rows else None]
+        for name in funcs:
+            if name == 'median':
+                graphs.append(numeric.quantile(0.5))
+            elif name == 'count':
+                graphs.append(self.frame.count())
+            else:
+                graphs.append(getattr(numeric, name)())
+
+        values = dask.compute(*graphs, scheduler=self.scheduler)
+        results = {}
+        for name, value in zip(funcs, values[1:]):
+            value = pd.Series(value)
+            value.name = None
+            results[name] = value
+        return values[0], results
+
+
+def from_dask(frame, head=10, scheduler=None):
+    """Split a Dask DataFrame into the rows to display and its statistics.
+
+    Partitions are computed one at a time until ``head`` rows are found, so
+    only the leading partitions of the frame are read for display.
+
+    :returns: Tuple of a pandas DataFrame and :py:class:`DaskStats`.
+    """
+    parts = []
+    rows = 0
+    for i in range(frame.npartitions):
+        part = frame.get_partition(i).head(
+            head - rows, npartitions=1, compute=False
+        ).compute(scheduler=scheduler)
+        parts.append(part)
+        rows += len(part)
+        if rows >= head:
+            break
+
+    data = pd.concat(parts) if len(parts) > 1 else parts[0]
+    return data, DaskStats(frame, scheduler)
+
+
+def is_polars_frame(data):
+    """Check whether data is a ``polars.DataFrame`` or ``polars.LazyFrame``,
+    without importing Polars"""
+    return (type(data).__module__.startswith('polars.') and
+            hasattr(data, 'lazy') and hasattr(data, 'collect_schema'))
+
+
+class PolarsStats(LazyStats):
+    """PolarsStats
+
+    Statistics of a Polars DataFrame or LazyFrame. Reductions and the
+    number of rows are computed by one ``select`` of lazy expressions, which
+    Polars optimizes and runs in parallel as a single query. NaN is treated
+    as missing, as in pandas, and ``median`` is exact.
+
+    :param frame: Polars DataFrame or LazyFrame.
+    """
+
+    source = 'Polars'
+
+    def __init__(self, frame):
+        import polars as pl
+
+        self.frame = frame.lazy()
+        schema = self.frame.collect_schema()
+        super(PolarsStats, self).__init__(schema.names())
+        self.numeric = [name for name, dtype in schema.items()
+                        if dtype.is_numeric() or dtype == pl.Boolean]
+        self.floats = [name for name, dtype in schema.items()
+                       if dtype.is_float()]
+
+    def _compute(self, funcs, rows):
+        import polars as pl
+
+        expressions = [pl.len().alias('rows')] if rows else []
+        for name in funcs:
+            for i, column in enumerate(self._reduced(name)):
+                expression = pl.col(column)
+                if column in self.floats:
+                    expression = expression.fill_nan(None)
+                expressions.append(
+                    getattr(expression, name)().alias('{}:{}'.format(name, i))
+                )
+        values = {}
+        if expressions:
+            values = self.frame.select(expressions).collect().row(
+                0, named=True)
+        results = {}
+        for name in funcs:
+            columns = self._reduced(name)
+            results[name] = pd.Series(
+                [values['{}:{}'.format(name, i)] for i in range(len(columns))],
+                index=columns, dtype='int64' if name == 'count' else 'float64')
+        return values.get('rows'), results
+
+    def _reduced(self, name):
+        """Columns the reduction name is computed over"""
+        return list(self.columns) if name == 'count' else self.numeric
+
+
+def from_polars(frame, head=10):
+    """Split a Polars DataFrame or LazyFrame into the rows to display and its
+    statistics.
+
+    Only the first ``head`` rows are collected and converted to pandas.
+
+    :returns: Tuple of a pandas DataFrame and :py:class:`PolarsStats`.
+    """
+    data = frame.lazy().head(head).collect().to_pandas()
+    return data, PolarsStats(frame)
@@ -0,0 +1,338 @@
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+import hashlib
+import os
+import tempfile
+from threading import RLock
+
+import numpy as np
+import pandas as pd
+
+
+#: Number of rows sampled when fingerprinting a DataFrame.
+FINGERPRINT_SAMPLE_ROWS = 64
+
+#: Default number of materialized frames kept per PrettyPandas chain.
+FRAME_CACHE_SIZE = 8
+
+#: Default memory budget for materialized frames per PrettyPandas chain.
+FRAME_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+#: Default number of rendered tables kept by an in-memory HTML cache.
+HTML_CACHE_SIZE = 128
+
+#: Default memory budget of an in-memory HTML cache.
+HTML_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+#: Number of rows hashed at a time by data_digest.
+DIGEST_BLOCK_ROWS = 65536
+
+
+class LRUCache(object):
+    """LRUCache
+
+    Least recently used cache bounded by entry count and optionally by size.
+
+    :param maxsize:
+        Maximum number of entries to keep. ``None`` for no limit.
+    :param max_bytes:
+        Maximum total size of the cached values. ``None`` for no limit.
+    :param sizeof:
+        Function returning the size in bytes of a cached value. Required for
+        ``max_bytes`` to have an effect.
+    """
+
+    def __init__(self, maxsize=128, max_bytes=None, sizeof=None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+
+        self._data = OrderedDict()
+        self._lock = RLock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        """Return the value for key and mark it as recently used"""
+        with self._lock:
+            try:
+                value, size = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self._data[key] = (value, size)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Store value under key, evicting old entries if needed"""
+        size = self.sizeof(value) if self.sizeof is not None else 0
+
+        with self._lock:
+            if key in self._data:
+                self.nbytes -= self._data.pop(key)[1]
+
+            if self.max_bytes is not None and size > self.max_bytes:
+                return value
+
+            self._data[key] = (value, size)
+            self.nbytes += size
+            self._evict()
+
+        return value
+
+    def _evict(self):
+        while self._data and (
+                (self.maxsize is not None and len(self._data) > self.maxsize)
+                or (self.max_bytes is not None and
+                    self.nbytes > self.max_bytes)):
+            _, (_, size) = self._data.popitem(last=False)
+            self.nbytes -= size
+
+    def clear(self):
+        """Remove every entry from the cache"""
+        with self._lock:
+            self._data.clear()
+            self.nbytes = 0
+
+    @property
+    def stats(self):
+        """Dictionary of hit, miss and size statistics"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self._data),
+            'nbytes': self.nbytes,
+        }
+
+
+def frame_nbytes(df):
+    """Shallow memory footprint of a DataFrame in bytes"""
+    return int(df.memory_usage(index=True, deep=False).sum())
+
+
+def data_fingerprint(df, sample_rows=FINGERPRINT_SAMPLE_ROWS):
+    """Cheap fingerprint of a DataFrame.
+
+    Combines the object identity, shape, labels and dtypes with a hash of an
+    evenly spaced sample of rows, so it costs the same regardless of the
+    size of the frame. In-place edits outside the sample are not detected;
+    use ``PrettyPandas.invalidate`` after mutating data in place.
+    """
+    n = len(df)
+    if n > sample_rows:
+        positions = np.linspace(0, n - 1, sample_rows).astype('int64')
+        sample = df.iloc[positions]
+    else:
+        sample = df
+
+    try:
+        sample_hash = int(pd.util.hash_pandas_object(sample, index=True).sum())
+    except TypeError:
+        sample_hash = None
+
+    return (
+        id(df),
+        df.shape,
+        tuple(df.columns),
+        tuple(str(dtype) for dtype in df.dtypes),
+        sample_hash,
+    )
+
+
+def frame_cache(maxsize=FRAME_CACHE_SIZE, max_bytes=FRAME_CACHE_MAX_BYTES):
+    """Create a cache for materialized summary frames"""
+    return LRUCache(maxsize=maxsize, max_bytes=max_bytes, sizeof=frame_nbytes)
+
+
+def html_cache(maxsize=HTML_CACHE_SIZE, max_bytes=HTML_CACHE_MAX_BYTES):
+    """Create an in-memory cache for rendered HTML"""
+    return LRUCache(maxsize=maxsize, max_bytes=max_bytes, sizeof=len)
+
+
+class DataDigest(object):
+    """DataDigest
+
+    Running digest of the column labels, dtypes, index and values of a
+    DataFrame. Rows appended to the frame are added with :py:meth:`update`,
+    so extending the digest never hashes the rows already added again.
+
+    :param df: DataFrame whose column labels and dtypes start the digest.
+        Its rows are not added.
+    """
+
+    def __init__(self, df):
+        self.rows = 0
+        self._hash = hashlib.blake2b(digest_size=20)
+        self._hash.update(repr((
+            [repr(label) for label in df.columns],
+            [str(dtype) for dtype in df.dtypes],
+        )).encode('utf-8'))
+
+    def copy(self):
+        """Return an independent copy of this digest"""
+        new = self.__class__.__new__(self.__class__)
+        new.rows = self.rows
+        new._hash = None if self._hash is None else self._hash.copy()
+        return new
+
+    def update(self, rows, block_rows=DIGEST_BLOCK_ROWS):
+        """Add the rows of a DataFrame with the labels and dtypes of the
+        frame. Rows are hashed ``block_rows`` at a time with
+        ``pd.util.hash_pandas_object``, so no more than one block of row
+        hashes is held in memory."""
+        if self._hash is not None:
+            try:
+                for start in range(0, len(rows), block_rows):
+                    block = rows.iloc[start:start + block_rows]
+                    hashes = pd.util.hash_pandas_object(block, index=True)
+                    self._hash.update(hashes.values.tobytes())
+            except TypeError:
+                self._hash = None
+        self.rows += len(rows)
+        return self
+
+    def hexdigest(self):
+        """Hex string, or None if some values cannot be hashed"""
+        if self._hash is None:
+            return None
+        digest = self._hash.copy()
+        digest.update(repr(self.rows).encode('utf-8'))
+        return digest.hexdigest()
+
+
+def data_digest(df, block_rows=DIGEST_BLOCK_ROWS):
+    """Digest of the labels, dtypes and every value of a DataFrame.
+
+    Unlike :func:`data_fingerprint` this reads the whole frame, so any
+    change is detected and the digest is stable across processes. See
+    :py:class:`DataDigest`.
+
+    :returns: Hex string, or None if some values cannot be hashed.
+    """
+    return DataDigest(df).update(df, block_rows).hexdigest()
+
+
+class DiskCache(object):
+    """DiskCache
+
+    Cache of strings stored as files in a directory, which can be shared
+    by processes and survives restarts. It has the same interface as
+    :py:class:`LRUCache`, so it can be used as a render cache.
+
+    Files are replaced atomically, and least recently used files are removed
+    when the directory holds more than ``max_bytes``.
+
+    :param directory:
+        Directory holding the cached files. Created if missing.
+    :param max_bytes:
+        Maximum total size of the cached files. ``None`` for no limit.
+    """
+
+    suffix = '.prettypandas'
+
+    def __init__(self, directory, max_bytes=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, name + self.suffix)
+
+    def _files(self):
+        paths = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(self.suffix):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                paths.append((stat.st_mtime, stat.st_size, entry.path))
+        return paths
+
+    def __len__(self):
+        return len(self._files())
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    def get(self, key, default=None):
+        """Return the value for key and mark it as recently used"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = f.read().decode('utf-8')
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        """Store value under key, evicting old files if needed"""
+        data = value.encode('utf-8')
+        if self.max_bytes is not None and len(data) > self.max_bytes:
+            return value
+
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+        self._evict()
+        return value
+
+    def _evict(self):
+        if self.max_bytes is None:
+            return
+
+        files = sorted(self._files())
+        nbytes = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if nbytes <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            nbytes -= size
+
+    def clear(self):
+        """Remove every cached file"""
+        for _, _, path in self._files():
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    @property
+    def stats(self):
+        """Dictionary of hit, miss and size statistics"""
+        files = self._files()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(files),
+            'nbytes': sum(size for _, size, _ in files),
+        }
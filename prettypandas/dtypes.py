@@ -0,0 +1,96 @@
+from __future__ import unicode_literals
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+
+#: ``pd.ArrowDtype``, or None for pandas versions without it.
+ArrowDtype = getattr(pd, 'ArrowDtype', None)
+
+
+def is_arrow(dtype):
+    """Check whether dtype is a ``pd.ArrowDtype``"""
+    return ArrowDtype is not None and isinstance(dtype, ArrowDtype)
+
+
+def _arrow_kind(dtype):
+    import pyarrow as pa
+
+    arrow_type = dtype.pyarrow_dtype
+    if pa.types.is_boolean(arrow_type):
+        return 'b'
+    if pa.types.is_signed_integer(arrow_type):
+        return 'i'
+    if pa.types.is_unsigned_integer(arrow_type):
+        return 'u'
+    if pa.types.is_floating(arrow_type):
+        return 'f'
+    return None
+
+
+def numeric_kind(dtype):
+    """NumPy kind (``'b'``, ``'i'``, ``'u'`` or ``'f'``) of a numeric or
+    boolean dtype, including nullable and Arrow dtypes, or None."""
+    if is_arrow(dtype):
+        return _arrow_kind(dtype)
+    if not is_numeric_dtype(dtype):
+        return None
+    kind = getattr(dtype, 'kind', None)
+    return kind if kind in ('b', 'i', 'u', 'f') else None
+
+
+def is_numeric(dtype):
+    """Check whether dtype holds numbers or booleans"""
+    return numeric_kind(dtype) is not None
+
+
+def is_nullable_numeric(dtype):
+    """Check whether dtype is a nullable (``Int64``, ``Float64``...) or
+    Arrow integer or float dtype"""
+    return not isinstance(dtype, np.dtype) and \
+        numeric_kind(dtype) in ('i', 'u', 'f')
+
+
+def float_dtype(dtype):
+    """Nullable float dtype of the same family as dtype"""
+    if is_arrow(dtype):
+        import pyarrow as pa
+        return ArrowDtype(pa.float64())
+    return pd.Float64Dtype()
+
+
+def numeric_values(values):
+    """Convert a numeric array to a NumPy array without boxing values.
+
+    NumPy arrays are returned unchanged. Nullable and Arrow arrays are
+    converted with their own kernels: integers to ``int64`` or ``uint64``
+    with missing values set to 0, floats to ``float64`` with missing values
+    set to NaN.
+
+    :returns: Tuple of the NumPy array and a boolean array marking missing
+        values, or None for NumPy arrays.
+    """
+    if isinstance(values, np.ndarray):
+        return values, None
+
+    kind = numeric_kind(values.dtype)
+    if kind not in ('i', 'u', 'f'):
+        return np.asarray(values), None
+
+    target = {'i': 'int64', 'u': 'uint64', 'f': 'float64'}[kind]
+    if is_arrow(values.dtype):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        data = pa.array(values)
+        missing = pc.is_null(data, nan_is_null=True)
+        data = pc.cast(data, pa.from_numpy_dtype(np.dtype(target)))
+        if kind != 'f':
+            data = pc.fill_null(data, 0)
+        return (data.to_numpy(zero_copy_only=False),
+                missing.to_numpy(zero_copy_only=False))
+
+    missing = np.asarray(values.isna())
+    na_value = np.nan if kind == 'f' else 0
+    return values.to_numpy(dtype=target, na_value=na_value), missing
@@ -0,0 +1,211 @@
+from __future__ import unicode_literals
+
+import datetime
+from numbers import Real
+
+import numpy as np
+import pandas as pd
+
+from .profiling import stage
+from .render import format_values
+
+
+#: Number of rows converted to Python values at a time by write_excel.
+EXCEL_BLOCK_ROWS = 10000
+
+#: Types written to cells as they are; other values are written as text.
+_NATIVE = (str, Real, datetime.date, datetime.time, datetime.timedelta)
+
+
+def _excel_values(values):
+    """Values of a Series or Index slice as a list xlsxwriter can write,
+    with missing values as None"""
+    out = values.tolist()
+    if values.dtype.kind == 'O':
+        out = [v if isinstance(v, _NATIVE) else str(v) for v in out]
+    for i in np.flatnonzero(np.asarray(values.isna())):
+        out[i] = None
+    return out
+
+
+def _layers(df, formatters):
+    """Formatting of each column of df, as a list per column of
+    ``(rows, kind, value)`` in order of precedence. ``rows`` is None when
+    the layer covers the whole column, ``kind`` is ``'format'`` for a native
+    Excel number format and ``'text'`` for a formatter function whose output
+    is written as text."""
+    layers = [[] for _ in range(df.shape[1])]
+    for formatter in formatters:
+        rows, cols = formatter.positions(df)
+        func = formatter.formatter
+        excel_format = getattr(func, 'excel_format', None)
+        num_format = excel_format() if excel_format is not None else None
+        layer = ('format', num_format) if num_format is not None \
+            else ('text', func)
+
+        if len(np.unique(rows)) == df.shape[0]:
+            for j in cols:
+                layers[j] = [(None,) + layer]
+        else:
+            for j in cols:
+                layers[j].append((rows,) + layer)
+    return layers
+
+
+class _Column(object):
+    """Cell formats and text of one column of a written frame"""
+
+    def __init__(self, df, j, layers):
+        n = df.shape[0]
+        self.choice = None
+        self.text = None
+        self.layers = layers
+        self.base = 0 if layers and layers[0][0] is None else -1
+
+        if any(rows is not None for rows, _, _ in layers):
+            self.choice = np.full(n, self.base, dtype='int16')
+            for i, (rows, _, _) in enumerate(layers):
+                if rows is not None:
+                    self.choice[rows] = i
+
+        for i, (rows, kind, func) in enumerate(layers):
+            if kind != 'text':
+                continue
+            if self.text is None:
+                self.text = np.full(n, None, dtype=object)
+            rows = np.arange(n) if self.choice is None \
+                else np.flatnonzero(self.choice == i)
+            self.text[rows] = format_values(func, df.iloc[rows, j].values)
+
+    def num_format(self, i=None):
+        """Number format of the cell in row i, or of the column"""
+        layer = self.base if i is None or self.choice is None \
+            else self.choice[i]
+        if layer < 0 or self.layers[layer][1] != 'format':
+            return None
+        return self.layers[layer][2]
+
+    def overrides(self, start, stop):
+        """Rows between start and stop whose format differs from the
+        column format"""
+        if self.choice is None:
+            return ()
+        return start + np.flatnonzero(self.choice[start:stop] != self.base)
+
+    def values(self, series, start, stop):
+        out = _excel_values(series)
+        if self.text is not None:
+            text = self.text[start:stop]
+            for i in np.flatnonzero(pd.notna(text)):
+                out[i] = text[i]
+        return out
+
+
+def _header_rows(df, index):
+    """Rows of header labels, one per level of the column index"""
+    levels = df.columns.nlevels
+    rows = []
+    for level in range(levels):
+        labels = [None] * df.index.nlevels if index else []
+        if index and level == levels - 1:
+            labels = list(df.index.names)
+        labels += [str(v) for v in df.columns.get_level_values(level)]
+        rows.append(labels)
+    return rows
+
+
+def write_excel(df, path, formatters=(), summary_rows=None,
+                summary_cols=None, sheet_name='Sheet1', index=True):
+    """Write a DataFrame to an XLSX file with native number formats.
+
+    The workbook is written by xlsxwriter in ``constant_memory`` mode, one
+    row at a time, with values converted to Python in blocks of
+    ``EXCEL_BLOCK_ROWS`` rows so memory use does not grow with the frame.
+
+    Formatters with an ``excel_format``, such as those of
+    :py:meth:`as_percent`, :py:meth:`as_unit` and :py:meth:`as_currency`,
+    become Excel number formats and cells keep their numeric values.
+    Columns fully covered by a formatter get a column format; only cells of
+    formatters with a row subset are written with their own format. Other
+    formatters are applied in Python and their output written as text.
+
+    :param df: DataFrame to write.
+    :param path: Path or file-like object of the workbook.
+    :param formatters: Iterable of Formatter objects.
+    :param summary_rows: Boolean array marking rows written in bold.
+    :param summary_cols: Boolean array marking columns written in bold.
+    :param sheet_name: Name of the worksheet.
+    :param index: Write the index as the first columns.
+    """
+    import xlsxwriter
+
+    n, m = df.shape
+    if summary_rows is None:
+        summary_rows = np.zeros(n, dtype=bool)
+    if summary_cols is None:
+        summary_cols = np.zeros(m, dtype=bool)
+
+    workbook = xlsxwriter.Workbook(path, {
+        'constant_memory': True,
+        'nan_inf_to_errors': True,
+        'remove_timezone': True,
+        'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+    })
+    worksheet = workbook.add_worksheet(sheet_name)
+    formats = {(None, False): None}
+
+    def cell_format(num_format, bold):
+        key = (num_format, bool(bold))
+        if key not in formats:
+            properties = {'bold': True} if bold else {}
+            if num_format is not None:
+                properties['num_format'] = num_format
+            formats[key] = workbook.add_format(properties)
+        return formats[key]
+
+    with stage('excel.formats'):
+        columns = [_Column(df, j, layers)
+                   for j, layers in enumerate(_layers(df, formatters))]
+
+    offset = df.index.nlevels if index else 0
+    for j, column in enumerate(columns):
+        fmt = cell_format(column.num_format(), summary_cols[j])
+        if fmt is not None:
+            worksheet.set_column(offset + j, offset + j, None, fmt)
+
+    bold = cell_format(None, True)
+    header = _header_rows(df, index)
+    for r, labels in enumerate(header):
+        worksheet.write_row(r, 0, labels, bold)
+
+    with stage('excel.rows'):
+        for start in range(0, n, EXCEL_BLOCK_ROWS):
+            stop = min(start + EXCEL_BLOCK_ROWS, n)
+            labels = [_excel_values(df.index.get_level_values(k)[start:stop])
+                      for k in range(offset)]
+            values = [column.values(df.iloc[start:stop, j], start, stop)
+                      for j, column in enumerate(columns)]
+            overrides = {}
+            for j, column in enumerate(columns):
+                for i in column.overrides(start, stop):
+                    overrides.setdefault(i, []).append(j)
+
+            for i in range(start, stop):
+                r = len(header) + i
+                for k in range(offset):
+                    worksheet.write(r, k, labels[k][i - start], bold)
+
+                row = [column[i - start] for column in values]
+                if summary_rows[i]:
+                    for j, value in enumerate(row):
+                        worksheet.write(r, offset + j, value, cell_format(
+                            columns[j].num_format(i), True))
+                    continue
+
+                worksheet.write_row(r, offset, row)
+                for j in overrides.get(i, ()):
+                    worksheet.write(r, offset + j, row[j], cell_format(
+                        columns[j].num_format(i), summary_cols[j]))
+
+    with stage('excel.close'):
+        workbook.close()
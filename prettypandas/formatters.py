@@ -1,40 +1,422 @@
-from numbers import Number, Integral
-from functools import partial, wraps
+from decimal import ROUND_HALF_EVEN, Decimal
+from numbers import Integral, Real
 import locale
+import re
 
-from babel import Locale, numbers
+import numpy as np
+import pandas as pd
+from .cache import LRUCache
+from .dtypes import is_nullable_numeric, numeric_values
 
 
-LOCALE, ENCODING = locale.getlocale()
-LOCALE_OBJ = Locale(LOCALE or "en_US")
+_default_locale = None
 
 
-def _surpress_formatting_errors(fn):
+def default_locale():
+    """Babel ``Locale`` of the process locale, falling back to ``en_US``.
+
+    Babel is imported and the locale resolved on first use, so importing
+    PrettyPandas stays fast for programs that never format currencies.
+    """
+    global _default_locale
+    if _default_locale is None:
+        from babel import Locale
+
+        name, _ = locale.getlocale()
+        _default_locale = Locale(name or "en_US")
+    return _default_locale
+
+
+def __getattr__(name):
+    # LOCALE, ENCODING and LOCALE_OBJ used to be computed at import time.
+    if name in ('LOCALE', 'ENCODING'):
+        return locale.getlocale()[name == 'ENCODING']
+    if name == 'LOCALE_OBJ':
+        return default_locale()
+    raise AttributeError(
+        "module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def _escape_pattern(text):
+    return text.replace('%', '%%')
+
+
+class ArrayFormatter(object):
+    """ArrayFormatter
+
+    Base class for compiled formatters. Whole arrays are formatted in a
+    single pass, with missing values and non-numeric values handled by masks
+    instead of per-cell exceptions. Subclasses implement
+    :py:meth:`_format_numbers`.
+
+    Calling the formatter on a single value gives the same result as
+    formatting an array containing that value.
+    """
+
+    def __call__(self, v):
+        if isinstance(v, Real):
+            if v != v:
+                return ''
+            return self._format_numbers(np.array([v], dtype='float64'))[0]
+        if v is pd.NA:
+            return ''
+        return v
+
+    def _format_numbers(self, numbers):
+        """Format a float64 array containing no missing values."""
+        raise NotImplementedError
+
+    def excel_format(self):
+        """Equivalent Excel number format string, or None if the format
+        cannot be expressed natively in Excel."""
+        return None
+
+    def format_array(self, values):
+        """Format an array-like of values.
+
+        :param values: Array-like of values.
+        :returns: NumPy object array of formatted strings. Missing values
+            become empty strings and non-numeric values are left unchanged.
+        """
+        if is_nullable_numeric(getattr(values, 'dtype', None)):
+            # Nullable and Arrow arrays are converted with their own
+            # kernels, never boxing values into an object array.
+            numbers, missing = numeric_values(values)
+            out = np.empty(len(numbers), dtype=object)
+            out[missing] = ''
+            out[~missing] = self._format_numbers(
+                numbers[~missing].astype('float64'))
+            return out
+
+        values = np.asarray(values)
+        out = np.empty(values.shape, dtype=object)
+
+        if values.dtype.kind in 'biuf':
+            numeric = np.ones(values.shape, dtype=bool)
+            numbers = values.astype('float64')
+        else:
+            out[...] = values
+            numeric = np.fromiter(
+                (isinstance(v, Real) for v in values.flat),
+                dtype=bool,
+                count=values.size,
+            ).reshape(values.shape)
+            numbers = np.zeros(values.shape, dtype='float64')
+            numbers[numeric] = values[numeric].astype('float64')
+
+        missing = numeric & np.isnan(numbers)
+        valid = numeric & ~missing
+
+        out[missing] = ''
+        out[valid] = self._format_numbers(numbers[valid])
+        return out
+
+    def format_series(self, series):
+        """Format a Series, returning a Series of strings."""
+        return pd.Series(self.format_array(series.values),
+                         index=series.index,
+                         name=series.name)
+
+    def lookup(self, values):
+        """Build a per-value formatter backed by a bulk formatted table.
+
+        The unique values are formatted in one pass with
+        :py:meth:`format_array`; the returned function only performs a
+        dictionary lookup, falling back to formatting values it has not
+        seen.
+        """
+        uniques = pd.unique(np.asarray(values, dtype=object).ravel())
+        table = dict(zip(uniques.tolist(), self.format_array(uniques)))
+
+        def inner(v):
+            try:
+                return table[v]
+            except (KeyError, TypeError):
+                return self(v)
+        return inner
+
+
+class NumberFormatter(ArrayFormatter):
+    """NumberFormatter
+
+    Compiled number formatter. The printf-style pattern is built once and
+    applied to every value.
+
+    :param precision:
+        Decimal places to round to.
+    :param prefix:
+        String placed before the number.
+    :param suffix:
+        String placed after the number.
+    :param scale:
+        Multiplier applied to values before formatting.
     """
-    I know this is dangerous and the wrong way to solve the problem, but when
-    using both row and columns summaries it's easier to just swallow errors
-    so users can format their tables how they need.
+
+    def __init__(self, precision=2, prefix='', suffix='', scale=1):
+        if not isinstance(precision, Integral):
+            raise TypeError("Precision must be an integer.")
+
+        self.precision = precision
+        self.prefix = prefix
+        self.suffix = suffix
+        self.scale = scale
+        self.pattern = "{}%.{}f{}".format(_escape_pattern(prefix),
+                                          precision,
+                                          _escape_pattern(suffix))
+
+    def __repr__(self):
+        return 'NumberFormatter({!r}, prefix={!r}, suffix={!r}, ' \
+            'scale={!r})'.format(self.precision, self.prefix, self.suffix,
+                                 self.scale)
+
+    def excel_format(self):
+        digits = _excel_digits('0', self.precision)
+        if self.scale == 100 and self.suffix == '%' and not self.prefix:
+            return digits + '%'
+        if self.scale != 1:
+            return None
+        return _excel_literal(self.prefix) + digits + \
+            _excel_literal(self.suffix)
+
+    def __call__(self, v):
+        if isinstance(v, Real):
+            if v != v:
+                return ''
+            return self.pattern % (v * self.scale)
+        if v is pd.NA:
+            return ''
+        return v
+
+    def _format_numbers(self, numbers):
+        if self.scale != 1:
+            numbers = numbers * self.scale
+        pattern = self.pattern
+        return [pattern % v for v in numbers.tolist()]
+
+
+def _excel_digits(integer, precision):
+    return integer + ('.' + '0' * precision if precision else '')
+
+
+def _excel_literal(text):
+    """Quote text as a literal in an Excel number format."""
+    return '"{}"'.format(text.replace('"', '"\\""')) if text else ''
+
+
+def _unquote(text):
+    """Remove CLDR literal quoting from a pattern affix."""
+    return re.sub(r"'([^']*)'", lambda m: m.group(1) or "'", text)
+
+
+class CurrencyFormatter(ArrayFormatter):
+    """CurrencyFormatter
+
+    Currency formatter compiled from a Babel ``NumberPattern``. The locale's
+    pattern, currency symbol, separators and the currency's precision are
+    resolved once, so formatting a value does not call into Babel.
+
+    Values are rounded like ``babel.numbers.format_currency``: values close
+    to a decimal rounding boundary are rounded half to even from their
+    shortest representation, so ``2.675`` becomes ``2.68``. Infinities are
+    shown with the locale's infinity symbol.
+
+    :param currency:
+        ISO 4217 currency code.
+    :param locale:
+        Babel ``Locale`` or locale identifier. Defaults to
+        :func:`default_locale`.
     """
-    @wraps(fn)
-    def inner(*args, **kwargs):
-        try:
-            return fn(*args, **kwargs)
-        except ValueError:
-            return ""
-    return inner
-
-
-def _format_numer(number_format, prefix='', suffix=''):
-    """Format a number to a string."""
-    @_surpress_formatting_errors
-    def inner(v):
-        if isinstance(v, Number):
-            return ("{{}}{{:{}}}{{}}"
-                    .format(number_format)
-                    .format(prefix, v, suffix))
+
+    def __init__(self, currency='USD', locale=None):
+        from babel import Locale, numbers
+
+        locale = Locale.parse(default_locale() if locale is None else locale)
+        pattern = locale.currency_formats['standard']
+
+        self.currency = currency
+        self.locale = locale
+        self.digits = numbers.get_currency_precision(currency)
+
+        symbol = numbers.get_currency_symbol(currency, locale)
+
+        def affix(text):
+            text = text.replace('\xa4\xa4\xa4',
+                                numbers.get_currency_name(currency,
+                                                          locale=locale))
+            text = text.replace('\xa4\xa4', currency.upper())
+            text = text.replace('\xa4', symbol)
+            return _unquote(text)
+
+        self.prefix = tuple(affix(p) for p in pattern.prefix)
+        self.suffix = tuple(affix(p) for p in pattern.suffix)
+        self.grouping = pattern.grouping
+        self.group_symbol = numbers.get_group_symbol(locale)
+        self.decimal_symbol = numbers.get_decimal_symbol(locale)
+        self.infinity_symbol = numbers.get_infinity_symbol(locale)
+        self.quantum = Decimal(1).scaleb(-self.digits)
+
+        if self.grouping[0] == self.grouping[1] == 3:
+            self.number_format = '{{:,.{}f}}'.format(self.digits)
         else:
-            raise TypeError("Numberic type required.")
-    return inner
+            self.number_format = '{{:.{}f}}'.format(self.digits)
+
+        self.translation = {}
+        if self.group_symbol != ',':
+            self.translation[ord(',')] = self.group_symbol
+        if self.decimal_symbol != '.':
+            self.translation[ord('.')] = self.decimal_symbol
+
+    def __repr__(self):
+        return 'CurrencyFormatter({!r}, {!r})'.format(self.currency,
+                                                      str(self.locale))
+
+    def excel_format(self):
+        """Equivalent Excel number format, with sections for positive and
+        negative values. Excel shows the group and decimal separators of
+        the reader's locale rather than those of ``locale``."""
+        number = _excel_digits('#,##0' if self.grouping[0] < 1000 else '0',
+                               self.digits)
+        return ';'.join(_excel_literal(prefix) + number +
+                        _excel_literal(suffix)
+                        for prefix, suffix in zip(self.prefix, self.suffix))
+
+    def _group(self, text):
+        """Apply irregular CLDR grouping such as ``#,##,##0``."""
+        integer, sep, fraction = text.partition('.')
+        size, parts = self.grouping[0], []
+        while len(integer) > size:
+            parts.append(integer[-size:])
+            integer = integer[:-size]
+            size = self.grouping[1]
+        parts.append(integer)
+        return ','.join(reversed(parts)) + sep + fraction
+
+    def _magnitudes(self, values):
+        """Absolute values as a list of numbers ready to be formatted.
+
+        Binary floats close to a decimal rounding boundary, such as
+        ``2.675``, are rounded as Babel does: from their shortest decimal
+        representation, half to even."""
+        magnitudes = np.abs(values)
+        scaled = magnitudes * 10.0 ** self.digits
+
+        # Scaling rounds by at most a few units in the last place, so only
+        # values within that distance of a tie can round differently
+        with np.errstate(invalid='ignore'):
+            ties = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) <=
+                                  4 * np.spacing(scaled))
+
+        out = magnitudes.tolist()
+        for i in ties:
+            out[i] = Decimal(repr(out[i])).quantize(self.quantum,
+                                                    ROUND_HALF_EVEN)
+        return out
+
+    def _format_numbers(self, values):
+        negative = np.signbit(values).tolist()
+        magnitudes = self._magnitudes(values)
+
+        number_format = self.number_format
+        formatted = [number_format.format(v) for v in magnitudes]
+
+        if number_format.startswith('{:.') and self.grouping[0] < 1000:
+            formatted = [self._group(text) for text in formatted]
+        if self.translation:
+            translation = self.translation
+            formatted = [text.translate(translation) for text in formatted]
+        for i in np.flatnonzero(np.isinf(values)):
+            formatted[i] = self.infinity_symbol
+
+        prefix, suffix = self.prefix, self.suffix
+        return [prefix[n] + text + suffix[n]
+                for n, text in zip(negative, formatted)]
+
+
+#: Number of compiled formatters shared through :func:`compiled_formatter`.
+FORMATTER_CACHE_SIZE = 256
+
+#: Formatter kinds understood by :func:`compiled_formatter`.
+FORMATTER_KINDS = ('percent', 'unit', 'currency')
+
+_FORMATTERS = LRUCache(maxsize=FORMATTER_CACHE_SIZE)
+
+
+def _formatter_spec(kind, precision, unit, location, currency, locale):
+    """Validate a formatter spec and return it with the fields the kind
+    does not use set to None, so equal formatters share one key."""
+    if kind == 'currency':
+        if locale is None:
+            locale = default_locale()
+        return (kind, None, None, None, currency, str(locale))
+
+    if not isinstance(precision, Integral):
+        raise TypeError("Precision must be an integer.")
+    if kind == 'percent':
+        return (kind, precision, None, None, None, None)
+    if kind == 'unit':
+        if location not in ('prefix', 'suffix'):
+            raise ValueError(
+                "location must be either 'prefix' or 'suffix'.")
+        return (kind, precision, unit, location, None, None)
+    raise ValueError("Unknown formatter kind {!r}, expected one of {}."
+                     .format(kind, ', '.join(FORMATTER_KINDS)))
+
+
+def _compile(kind, precision, unit, location, currency, locale):
+    if kind == 'percent':
+        return NumberFormatter(precision, suffix='%', scale=100)
+    if kind == 'unit':
+        return NumberFormatter(precision, **{location: unit})
+    return CurrencyFormatter(currency, locale)
+
+
+def compiled_formatter(kind, precision=2, unit=None, location='suffix',
+                       currency='USD', locale=None):
+    """Return a shared compiled formatter for a formatter spec.
+
+    Formatters are kept in a module level LRU cache keyed by ``(kind,
+    precision, unit, location, currency, locale)``, so every table using
+    the same formatting shares one formatter object and its compiled
+    patterns and Babel lookups. Compiled formatters must not be modified.
+
+    :param kind: One of ``FORMATTER_KINDS``.
+    :param precision: Decimal places for ``percent`` and ``unit``.
+    :param unit: Unit string for ``unit``.
+    :param location: ``'prefix'`` or ``'suffix'`` for ``unit``.
+    :param currency: ISO 4217 currency code for ``currency``.
+    :param locale: Babel locale for ``currency``, defaults to
+        :func:`default_locale`.
+    """
+    key = _formatter_spec(kind, precision, unit, location, currency, locale)
+    formatter = _FORMATTERS.get(key)
+    if formatter is None:
+        formatter = _FORMATTERS.set(
+            key, _compile(kind, precision, unit, location, currency, locale))
+    return formatter
+
+
+def formatter_cache_info():
+    """Dictionary of hit, miss and entry counts of the compiled formatter
+    cache, along with its ``maxsize``"""
+    info = _FORMATTERS.stats
+    info.pop('nbytes')
+    info['maxsize'] = _FORMATTERS.maxsize
+    return info
+
+
+def clear_formatter_cache():
+    """Empty the compiled formatter cache and reset its statistics"""
+    _FORMATTERS.clear()
+    _FORMATTERS.hits = _FORMATTERS.misses = 0
+
+
+def currency_formatter(currency='USD', locale=None):
+    """Return a compiled CurrencyFormatter for a currency and locale.
+
+    Formatters are cached by ``(currency, locale)`` so the Babel lookups are
+    only done once per pair.
+    """
+    return compiled_formatter('currency', currency=currency, locale=locale)
 
 
 def as_percent(precision=2, **kwargs):
@@ -46,12 +428,7 @@ def as_percent(precision=2, **kwargs):
     :param precision: int
         decimal places to round to
     """
-    if not isinstance(precision, Integral):
-        raise TypeError("Precision must be an integer.")
-
-    return _surpress_formatting_errors(
-        _format_numer(".{}%".format(precision))
-    )
+    return compiled_formatter('percent', precision)
 
 
 def as_unit(unit, precision=2, location='suffix'):
@@ -67,24 +444,15 @@ def as_unit(unit, precision=2, location='suffix'):
         'prefix' or 'suffix' representing where the currency symbol falls
         relative to the value
     """
-    if not isinstance(precision, Integral):
-        raise TypeError("Precision must be an integer.")
-
-    if location == 'prefix':
-        formatter = partial(_format_numer, prefix=unit)
-    elif location == 'suffix':
-        formatter = partial(_format_numer, suffix=unit)
-    else:
-        raise ValueError("location must be either 'prefix' or 'suffix'.")
-
-    return _surpress_formatting_errors(
-        formatter("0.{}f".format(precision))
-    )
+    return compiled_formatter('unit', precision, unit, location)
 
 
-def as_currency(currency='USD', locale=LOCALE_OBJ):
-    @_surpress_formatting_errors
-    def inner(v):
-        return numbers.format_currency(v, currency=currency, locale=LOCALE_OBJ)
-    return inner
+def as_currency(currency='USD', locale=None):
+    """Convert value to currency.
 
+    Parameters:
+    -----------
+    :param currency: ISO 4217 currency code
+    :param locale: Babel locale for currency formatting
+    """
+    return currency_formatter(currency, locale)
@@ -0,0 +1,250 @@
+from __future__ import unicode_literals
+
+import pandas as pd
+
+from .profiling import stage
+from .streaming import (ColumnStats, QuantileSketch, SKETCH_SIZE,
+                        STREAMING_REDUCTIONS)
+
+
+#: Reductions answered from Parquet row group statistics alone, without
+#: reading any data pages.
+METADATA_REDUCTIONS = frozenset(['min', 'max', 'count'])
+
+
+def _index_columns(schema):
+    metadata = schema.pandas_metadata or {}
+    return [name for name in metadata.get('index_columns', [])
+            if not isinstance(name, dict)]
+
+
+def _numeric_columns(schema, columns):
+    import pyarrow as pa
+
+    numeric = []
+    for name in columns:
+        arrow_type = schema.field(name).type
+        if pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type):
+            numeric.append(name)
+    return numeric
+
+
+def _metadata_stats(parquet_file, columns):
+    """min, max and count of columns from row group statistics.
+
+    :returns: Tuple of a dict of Series and the list of columns that had
+        complete statistics in every row group.
+    """
+    metadata = parquet_file.metadata
+    wanted = set(columns)
+    values = {name: {'min': [], 'max': [], 'count': 0} for name in columns}
+    complete = set(columns)
+
+    for i in range(metadata.num_row_groups):
+        row_group = metadata.row_group(i)
+        for j in range(row_group.num_columns):
+            chunk = row_group.column(j)
+            name = chunk.path_in_schema
+            if name not in wanted:
+                continue
+
+            statistics = chunk.statistics
+            if statistics is None or not statistics.has_null_count:
+                complete.discard(name)
+                continue
+
+            values[name]['count'] += statistics.num_values
+            if statistics.num_values:
+                if not statistics.has_min_max:
+                    complete.discard(name)
+                    continue
+                values[name]['min'].append(statistics.min)
+                values[name]['max'].append(statistics.max)
+
+    resolved = [name for name in columns if name in complete]
+    reduced = {
+        'min': pd.Series([min(values[n]['min'], default=float('nan'))
+                          for n in resolved], index=resolved,
+                         dtype='float64'),
+        'max': pd.Series([max(values[n]['max'], default=float('nan'))
+                          for n in resolved], index=resolved,
+                         dtype='float64'),
+        'count': pd.Series([values[n]['count'] for n in resolved],
+                           index=resolved, dtype='int64'),
+    }
+    return reduced, resolved
+
+
+def _value_counts(parquet_file, columns):
+    """Number of non-null values of columns, from the null counts of row
+    group statistics, or from the data of row groups without them."""
+    metadata = parquet_file.metadata
+    counts = dict.fromkeys(columns, 0)
+
+    for i in range(metadata.num_row_groups):
+        row_group = metadata.row_group(i)
+        unknown = set(columns)
+        for j in range(row_group.num_columns):
+            chunk = row_group.column(j)
+            name = chunk.path_in_schema
+            statistics = chunk.statistics
+            if name in unknown and statistics is not None and \
+                    statistics.has_null_count:
+                counts[name] += row_group.num_rows - statistics.null_count
+                unknown.discard(name)
+
+        if unknown:
+            table = parquet_file.read_row_group(
+                i, columns=[name for name in columns if name in unknown])
+            for name in table.column_names:
+                column = table.column(name)
+                counts[name] += len(column) - column.null_count
+
+    return pd.Series(counts, index=columns, dtype='int64')
+
+
+def _row_group_stats(table, sketch_size):
+    """Reduce the columns of an Arrow table with pyarrow.compute kernels.
+
+    Nulls and NaN are skipped, the same way pandas reductions skip missing
+    values. Only quantile sketches see the values as a NumPy array.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    reduced = {name: {} for name in ('count', 'sum', 'mean', 'min', 'max',
+                                     'm2')}
+    sketches = {}
+    for name in table.column_names:
+        values = pc.drop_null(pc.cast(table.column(name), pa.float64()))
+        values = pc.filter(values, pc.invert(pc.is_nan(values)))
+
+        count = len(values)
+        reduced['count'][name] = count
+        if count:
+            total = pc.sum(values).as_py()
+            bounds = pc.min_max(values)
+            reduced['sum'][name] = total
+            reduced['mean'][name] = total / count
+            reduced['min'][name] = bounds['min'].as_py()
+            reduced['max'][name] = bounds['max'].as_py()
+            reduced['m2'][name] = pc.variance(values).as_py() * count
+        else:
+            reduced['sum'][name] = 0.0
+
+        if sketch_size is not None:
+            sketches[name] = QuantileSketch(sketch_size).update(
+                values.to_numpy(zero_copy_only=False))
+
+    return ({name: pd.Series(column, index=table.column_names,
+                             dtype='int64' if name == 'count' else 'float64')
+             for name, column in reduced.items()},
+            sketches)
+
+
+def _head(parquet_file, columns, head):
+    """First head rows of columns as a DataFrame, restoring the index"""
+    import pyarrow as pa
+
+    schema = parquet_file.schema_arrow
+    batches = []
+    rows = 0
+    if head > 0:
+        for batch in parquet_file.iter_batches(batch_size=head,
+                                               columns=columns,
+                                               use_pandas_metadata=True):
+            batches.append(batch.slice(0, head - rows))
+            rows += len(batches[-1])
+            if rows >= head:
+                break
+
+    if not batches:
+        names = columns + [n for n in _index_columns(schema)
+                           if n not in columns]
+        return schema.empty_table().select(names).to_pandas()
+    return pa.Table.from_batches(batches).to_pandas()
+
+
+def read_parquet(path, columns=None, head=10, summaries=None,
+                 sketch_size=SKETCH_SIZE):
+    """Read the rows to display and the statistics of a Parquet file.
+
+    When every summary is in ``METADATA_REDUCTIONS`` they are answered from
+    the row group statistics stored in the file, and no data pages are read
+    apart from the displayed rows, except to count the values of float
+    columns, since statistics count NaN as a value. Columns without
+    complete statistics, and other summaries, are computed by reading one
+    row group at a time, memory-mapped and projected to ``columns``, with
+    pyarrow.compute kernels. ``count`` of other columns is taken from the
+    null counts of the row group statistics. Only the first ``head`` rows
+    are converted to a DataFrame.
+
+    :param path: Path of the Parquet file.
+    :param columns: Columns to read. Defaults to every column except those
+        storing the pandas index.
+    :param head: Number of rows to keep for display.
+    :param summaries: Names of the reductions the table will use, from
+        ``STREAMING_REDUCTIONS``. Defaults to all of them.
+    :param sketch_size: Centroids kept per column for approximate medians.
+    :returns: Tuple of the displayed rows and their
+        :py:class:`ColumnStats <prettypandas.streaming.ColumnStats>`.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    summaries = STREAMING_REDUCTIONS if summaries is None \
+        else frozenset(summaries)
+    unsupported = summaries - STREAMING_REDUCTIONS
+    if unsupported:
+        raise ValueError("Cannot compute {} from Parquet files.".format(
+            ', '.join(sorted(unsupported))))
+
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    schema = parquet_file.schema_arrow
+    if columns is None:
+        index = set(_index_columns(schema))
+        columns = [name for name in schema.names if name not in index]
+    columns = list(columns)
+    numeric = _numeric_columns(schema, columns)
+
+    if 'median' not in summaries:
+        sketch_size = None
+    stats = ColumnStats(sketch_size)
+
+    remaining = numeric
+    if summaries <= METADATA_REDUCTIONS:
+        # Value counts in statistics include NaN, so floats are counted
+        # from their row groups
+        candidates = numeric
+        if 'count' in summaries:
+            candidates = [name for name in numeric
+                          if not pa.types.is_floating(schema.field(name).type)]
+        with stage('parquet.metadata'):
+            reduced, resolved = _metadata_stats(parquet_file, candidates)
+
+        # Statistics of columns answered from metadata only hold the
+        # reductions stored in the file.
+        stats.exact_reductions = METADATA_REDUCTIONS
+        reduced['sum'] = reduced['mean'] = reduced['m2'] = \
+            pd.Series(float('nan'), index=resolved)
+        stats.add([], 0, reduced)
+        remaining = [name for name in numeric if name not in resolved]
+
+    if remaining:
+        with stage('parquet.row_groups'):
+            for i in range(parquet_file.metadata.num_row_groups):
+                table = parquet_file.read_row_group(i, columns=remaining)
+                reduced, sketches = _row_group_stats(table, sketch_size)
+                stats.add([], 0, reduced, sketches)
+
+    others = [name for name in columns if name not in numeric]
+    if others and 'count' in summaries:
+        with stage('parquet.counts'):
+            stats.add([], 0, {'count': _value_counts(parquet_file, others)})
+
+    stats.columns = pd.Index(columns)
+    stats.rows = parquet_file.metadata.num_rows
+
+    with stage('parquet.head'):
+        data = _head(parquet_file, columns, head)
+    return data, stats
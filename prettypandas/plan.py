@@ -0,0 +1,364 @@
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+import hashlib
+from operator import methodcaller
+import types
+
+import numpy as np
+from pandas.api.types import is_list_like
+
+from .aggregation import NUMERIC_REDUCTIONS
+from .dtypes import is_numeric
+from .formatters import ArrayFormatter
+
+
+#: Kinds of operations a Plan holds, in the order they are explained.
+KINDS = ('subtotals', 'summary_rows', 'summary_cols', 'formatters')
+
+
+def freeze(value):
+    """Hashable version of value, converting lists, dicts and slices.
+
+    Raises TypeError if value contains something else that is unhashable.
+    """
+    if isinstance(value, list):
+        return ('list', tuple(freeze(v) for v in value))
+    if isinstance(value, tuple):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, dict):
+        return ('dict', tuple(sorted((k, freeze(v))
+                                     for k, v in value.items())))
+    if isinstance(value, slice):
+        return ('slice', freeze(value.start), freeze(value.stop),
+                freeze(value.step))
+    hash(value)
+    return value
+
+
+def token(value):
+    """Stable string identifying value across processes, for persistent
+    cache keys.
+
+    Supports the values :func:`freeze` does, along with functions and
+    compiled formatters. Python functions are identified by their name,
+    code, defaults and closure. Raises TypeError for values without a
+    stable identity, such as lambdas, nested functions and arbitrary
+    objects.
+    """
+    if value is None or isinstance(value, (bool, int, float, complex, str,
+                                           bytes, np.generic)):
+        return repr(value)
+    if isinstance(value, (list, tuple)):
+        return '{}({})'.format(type(value).__name__,
+                               ','.join(token(v) for v in value))
+    if isinstance(value, dict):
+        return 'dict({})'.format(','.join(sorted(
+            '{}:{}'.format(token(k), token(v)) for k, v in value.items())))
+    if isinstance(value, slice):
+        return 'slice({},{},{})'.format(token(value.start),
+                                        token(value.stop),
+                                        token(value.step))
+    if isinstance(value, (methodcaller, ArrayFormatter)):
+        return repr(value)
+
+    name = getattr(value, '__qualname__', None)
+    module = getattr(value, '__module__', None)
+    if callable(value) and name and module and '<' not in name:
+        code = getattr(value, '__code__', None)
+        if code is None:
+            return '{}.{}'.format(module, name)
+        # Functions are identified by their code as well as their name, so
+        # a redefined function gets a new token
+        closure = [cell.cell_contents for cell in value.__closure__ or ()]
+        return '{}.{}:{}'.format(module, name, hashlib.blake2b(
+            '{}|{}|{}|{}'.format(
+                _code_token(code), token(value.__defaults__),
+                token(value.__kwdefaults__), token(closure),
+            ).encode('utf-8'), digest_size=20).hexdigest())
+    raise TypeError("{!r} has no stable token.".format(value))
+
+
+def _code_token(code):
+    """Token of a code object: its bytecode, constants and the names it
+    refers to"""
+    consts = [_code_token(c) if isinstance(c, types.CodeType) else token(c)
+              for c in code.co_consts]
+    return '{}|{}|{}|{}'.format(code.co_code.hex(), ','.join(consts),
+                                code.co_names, code.co_varnames)
+
+
+def dedupe_titles(aggregates):
+    """Return aggregates with repeated titles renamed ``title_1``,
+    ``title_2`` and so on, without modifying the aggregates."""
+    titles = set()
+    cleaned = []
+    for agg in aggregates:
+        title = agg.title
+        i = 1
+        while title in titles:
+            title = "{}_{}".format(agg.title, i)
+            i += 1
+
+        titles.add(title)
+        cleaned.append(agg if title == agg.title else agg.with_title(title))
+    return tuple(cleaned)
+
+
+class Plan(object):
+    """Plan
+
+    Immutable logical plan of a PrettyPandas table.
+
+    Each chained call adds one node pointing at the plan it was called on,
+    so tables chained from the same table share their common nodes and
+    chaining never copies earlier operations. Plans are equal when they
+    hold equal operations in the same order, and can be used as dict keys.
+
+    :param parent: Plan this node extends, or None for an empty plan.
+    :param kind: One of ``KINDS``.
+    :param op: Aggregate, Subtotal or Formatter added by this node.
+    """
+
+    __slots__ = ('parent', 'kind', 'op', '_ops', '_hash', '_memo')
+
+    def __init__(self, parent=None, kind=None, op=None):
+        self.parent = parent
+        self.kind = kind
+        self.op = op
+        self._ops = None
+        self._hash = None
+        self._memo = {}
+
+    @classmethod
+    def build(cls, **ops):
+        """Build a plan from lists of operations keyed by kind"""
+        plan = cls()
+        for kind in KINDS:
+            for op in ops.get(kind) or ():
+                plan = plan.add(kind, op)
+        return plan
+
+    def add(self, kind, op):
+        """Return a new plan with op appended"""
+        if kind not in KINDS:
+            raise ValueError("Unknown plan operation {!r}.".format(kind))
+        return Plan(self, kind, op)
+
+    def _all(self):
+        if self._ops is None:
+            nodes = []
+            node = self
+            while node.parent is not None:
+                nodes.append((node.kind, node.op))
+                node = node.parent
+            self._ops = tuple(reversed(nodes))
+        return self._ops
+
+    def ops(self, kind):
+        """Tuple of the operations of one kind, in the order added"""
+        if kind not in self._memo:
+            self._memo[kind] = tuple(op for k, op in self._all() if k == kind)
+        return self._memo[kind]
+
+    def titled(self, kind):
+        """Aggregates of one kind with unique titles, computed once"""
+        key = ('titled', kind)
+        if key not in self._memo:
+            self._memo[key] = dedupe_titles(self.ops(kind))
+        return self._memo[key]
+
+    def summary_key(self):
+        """Hashable key of the operations that change the summarized
+        frame, which excludes formatters"""
+        return tuple(self.ops(kind) for kind in KINDS[:3])
+
+    def token(self):
+        """Stable string identifying the operations of this plan across
+        processes, or None if an operation uses a value without one, such
+        as a lambda"""
+        if 'token' not in self._memo:
+            try:
+                self._memo['token'] = token([
+                    (kind, type(op).__name__, sorted(vars(op).items()))
+                    for kind, op in self._all()])
+            except TypeError:
+                self._memo['token'] = None
+        return self._memo['token']
+
+    def __len__(self):
+        return len(self._all())
+
+    def __iter__(self):
+        return iter(self._all())
+
+    def __eq__(self, other):
+        return isinstance(other, Plan) and self._all() == other._all()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(self._all())
+        return self._hash
+
+
+def _normalize_subset(agg, df):
+    """Aggregate with a list subset replaced by the selected labels in frame
+    order, or by None when it selects the whole frame."""
+    subset = agg.subset
+    if subset is None or not is_list_like(subset) or \
+            isinstance(subset, tuple):
+        return agg
+
+    labels = df.columns if agg.axis in (0, 'rows') else df.index
+    if not labels.is_unique:
+        return agg
+
+    positions = labels.get_indexer(list(subset))
+    if (positions < 0).any():
+        return agg
+
+    positions = np.unique(positions)
+    if len(positions) == len(labels):
+        return agg.with_subset(None)
+    return agg.with_subset(list(labels[positions]))
+
+
+def numeric_columns(df):
+    """Labels of the numeric and boolean columns of df, or None if every
+    column is numeric or the labels are not unique."""
+    if not df.columns.is_unique:
+        return None
+
+    numeric = np.array([is_numeric(dtype) for dtype in df.dtypes],
+                       dtype=bool)
+    if numeric.all():
+        return None
+    return list(df.columns[numeric])
+
+
+def _prune_columns(agg, numeric):
+    """Aggregate restricted to the numeric columns when it uses a reduction
+    that needs numbers and would otherwise reduce every column."""
+    if numeric is None or not isinstance(agg.func, str) or \
+            agg.func not in NUMERIC_REDUCTIONS:
+        return agg
+    if agg.axis in (0, 'rows') and agg.subset is not None:
+        return agg
+    return agg.with_columns(numeric)
+
+
+def optimize_aggregates(aggregates, df):
+    """Prune columns, push subsets down and merge aggregates computing the
+    same values.
+
+    Aggregates without a column subset using a reduction that needs
+    numbers, such as ``sum`` or ``mean``, only reduce the numeric columns of
+    ``df``; the other columns are left blank. Functions and other
+    reductions such as ``count`` or ``max`` reduce every column. Subsets
+    given as lists are resolved against ``df``, so different spellings of
+    the same columns share one evaluation and a subset naming every column
+    skips the selection. Aggregates with the same function, columns and
+    arguments are then evaluated once.
+
+    :param aggregates: Aggregates with unique titles.
+    :param df: DataFrame the aggregates are computed on.
+    :returns: Tuple of the unique aggregates to evaluate and, for each of
+        ``aggregates``, the position of its unique aggregate.
+    """
+    numeric = numeric_columns(df)
+
+    unique, positions, seen = [], [], {}
+    for agg in aggregates:
+        agg = _normalize_subset(_prune_columns(agg, numeric), df)
+        key = agg.key
+        if key not in seen:
+            seen[key] = len(unique)
+            unique.append(agg)
+        positions.append(seen[key])
+    return unique, positions
+
+
+def live_formatters(df, formatters):
+    """Drop formatters whose output is never displayed.
+
+    A formatter is dropped when its subset selects no cells, or when a
+    later formatter targets every row of each of its columns and so
+    overwrites all of its output.
+
+    :returns: List of the remaining formatters, in order.
+    """
+    targets = [formatter.positions(df) for formatter in formatters]
+
+    overwritten = np.zeros(df.shape[1], dtype=bool)
+    keep = []
+    for formatter, (rows, cols) in reversed(list(zip(formatters, targets))):
+        if len(rows) and len(cols) and not overwritten[cols].all():
+            keep.append(formatter)
+        if len(np.unique(rows)) == df.shape[0]:
+            overwritten[cols] = True
+    return keep[::-1]
+
+
+def _describe_subset(subset):
+    return 'all' if subset is None else repr(subset)
+
+
+def explain(plan, df, frame=None):
+    """Describe a plan and how it is evaluated for df.
+
+    :param plan: Plan to describe.
+    :param df: Data of the table.
+    :param frame: Summarized frame used to resolve formatters, if known.
+    :returns: Multi-line string.
+    """
+    lines = ['PrettyPandas plan for {} rows x {} columns'.format(*df.shape)]
+
+    for kind in KINDS:
+        if kind in ('summary_rows', 'summary_cols'):
+            ops = plan.titled(kind)
+        else:
+            ops = plan.ops(kind)
+        if not ops:
+            continue
+
+        lines.append('{}:'.format(kind.replace('_', ' ').capitalize()))
+        for op in ops:
+            lines.append('  ' + op.describe())
+
+    lines.append('Evaluation:')
+    for kind in ('summary_rows', 'summary_cols'):
+        aggregates = plan.titled(kind)
+        if not aggregates:
+            continue
+
+        unique, positions = optimize_aggregates(aggregates, df)
+        groups = OrderedDict()
+        for agg, position in zip(aggregates, positions):
+            groups.setdefault(position, []).append(agg.title)
+
+        for position, titles in groups.items():
+            agg = unique[position]
+            columns = '' if agg.columns is None else \
+                ' over {} numeric columns'.format(len(agg.columns))
+            lines.append('  {} {} on {}{} -> {}'.format(
+                'reduce' if agg.is_named_reduction else 'aggregate',
+                agg.describe_func(),
+                _describe_subset(agg.subset),
+                columns,
+                ', '.join(titles),
+            ))
+
+    formatters = plan.ops('formatters')
+    if formatters and frame is None:
+        lines.append('  formatters are resolved once the table is computed')
+    elif formatters:
+        kept = live_formatters(frame, formatters)
+        for formatter in formatters:
+            state = 'format' if any(f is formatter for f in kept) \
+                else 'drop'
+            lines.append('  {} {}'.format(state, formatter.describe()))
+
+    return '\n'.join(lines)
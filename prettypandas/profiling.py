@@ -0,0 +1,206 @@
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+
+_local = threading.local()
+
+#: Whether tracemalloc can reset its peak, which needs Python 3.9. Without
+#: it, the memory of a stage is measured from the traced memory when the
+#: stage and the stages it contains start and finish.
+_RESET_PEAK = hasattr(tracemalloc, 'reset_peak')
+
+
+class _NullStage(object):
+    """Stage used when no profiler is active."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def active_profiler():
+    """Return the innermost active Profiler of this thread, or None"""
+    stack = getattr(_local, 'stack', None)
+    return stack[-1] if stack else None
+
+
+def stage(name):
+    """Context manager recording a stage on the active profiler.
+
+    Does nothing when no profiler is active, so instrumented code pays a
+    single lookup.
+    """
+    profiler = active_profiler()
+    if profiler is None:
+        return _NULL_STAGE
+    return profiler.stage(name)
+
+
+def callable_name(func):
+    """Short name of a function or callable object for stage names"""
+    return getattr(func, '__name__', type(func).__name__)
+
+
+def _traced_memory():
+    """Current traced memory and its peak since the last reset, or the
+    current memory as the peak when the peak cannot be reset"""
+    current, peak = tracemalloc.get_traced_memory()
+    return current, peak if _RESET_PEAK else current
+
+
+class Profiler(object):
+    """Profiler
+
+    Record wall time, call counts and peak memory of the stages of the
+    PrettyPandas pipeline. A profiler is active inside a ``with`` block, and
+    during every call on a table created with ``PrettyPandas(...,
+    profile=...)``.
+
+    Stages can be nested. The time and memory of a stage include those of
+    the stages it contains. Peak memory is measured with ``tracemalloc``
+    relative to the memory in use when the stage starts, and is the largest
+    value over all calls of the stage. Before Python 3.9, where the peak of
+    ``tracemalloc`` cannot be reset, it is only sampled when stages start and
+    finish. Work done by executor pools is
+    timed in the stage that waits for it.
+
+    :param callback:
+        Optional function called with a dict with ``stage``, ``time`` and
+        ``peak_memory`` keys each time a stage finishes, e.g. to forward
+        timings to a metrics system.
+    :param memory:
+        Measure peak memory. Tracing allocations slows down the pipeline,
+        so disable it when only timings are needed.
+    """
+
+    def __init__(self, callback=None, memory=True):
+        self.callback = callback
+        self.memory = memory
+        self._records = OrderedDict()
+        self._frames = []
+        self._depth = 0
+        self._started_tracing = False
+
+    def __enter__(self):
+        if not hasattr(_local, 'stack'):
+            _local.stack = []
+        _local.stack.append(self)
+
+        if self._depth == 0 and self.memory and \
+                not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        _local.stack.pop()
+        self._depth -= 1
+        if self._depth == 0 and self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        return False
+
+    @contextmanager
+    def stage(self, name):
+        """Record the time and memory of the enclosed block as ``name``"""
+        memory = self.memory and tracemalloc.is_tracing()
+        if memory:
+            current, peak = _traced_memory()
+            if self._frames:
+                self._frames[-1][1] = max(self._frames[-1][1], peak)
+            if _RESET_PEAK:
+                tracemalloc.reset_peak()
+            self._frames.append([current, current])
+
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = time.perf_counter() - start
+
+            used = None
+            if memory:
+                _, peak = _traced_memory()
+                begin, seen = self._frames.pop()
+                peak = max(peak, seen)
+                if self._frames:
+                    self._frames[-1][1] = max(self._frames[-1][1], peak)
+                used = peak - begin
+
+            self._record(name, elapsed, used)
+
+    def _record(self, name, elapsed, used):
+        record = self._records.setdefault(name, [0, 0.0, None])
+        record[0] += 1
+        record[1] += elapsed
+        if used is not None:
+            record[2] = used if record[2] is None else max(record[2], used)
+
+        if self.callback is not None:
+            self.callback({'stage': name, 'time': elapsed,
+                           'peak_memory': used})
+
+    @property
+    def results(self):
+        """DataFrame of calls, total time in seconds and peak memory in
+        bytes, indexed by stage in the order stages first finished"""
+        return pd.DataFrame(
+            list(self._records.values()),
+            index=pd.Index(list(self._records), name='stage'),
+            columns=['calls', 'time', 'peak_memory'],
+        )
+
+    def reset(self):
+        """Forget all recorded stages"""
+        self._records.clear()
+        return self
+
+
+def _timed(profiler, name, method):
+    @wraps(method)
+    def timed(*args, **kwargs):
+        with profiler, profiler.stage(name):
+            return method(*args, **kwargs)
+    return timed
+
+
+def instrument_styler(styler, profiler):
+    """Record the rendering of a pandas Styler as ``style.render`` or
+    ``style.to_html`` stages, which include applying styles, formatting
+    cells and the Jinja template."""
+    for name in ('render', 'to_html'):
+        method = getattr(styler, name, None)
+        if method is not None:
+            setattr(styler, name, _timed(profiler, 'style.' + name, method))
+    return styler
+
+
+def profile(callback=None, memory=True):
+    """Profile every PrettyPandas call made inside a ``with`` block.
+
+    .. code-block:: python
+
+        with profile() as profiler:
+            html = PrettyPandas(df).total().as_percent().render()
+
+        profiler.results
+
+    :param callback: See :class:`Profiler`.
+    :param memory: See :class:`Profiler`.
+    :returns: Profiler to be used as a context manager.
+    """
+    return Profiler(callback=callback, memory=memory)
@@ -0,0 +1,473 @@
+from __future__ import unicode_literals
+
+from html import escape
+from numbers import Real
+
+import numpy as np
+import pandas as pd
+
+from .dtypes import is_nullable_numeric, numeric_values
+from .formatters import NumberFormatter
+from .profiling import callable_name, stage
+
+
+#: Decimal places used for floats without a formatter, matching pandas.
+DEFAULT_PRECISION = 6
+
+#: Number of table rows in each chunk yielded by HTMLRenderer.iter_chunks.
+CHUNK_ROWS = 1000
+
+#: Default number of data rows on each page of a paginated table.
+PAGE_SIZE = 100
+
+#: Text shown in the cells of the row marking rows left out of a table.
+ELLIPSIS = '...'
+
+#: Stylesheet emitted with every table rendered by HTMLRenderer.
+STYLESHEET = (
+    '<style>'
+    'table.prettypandas .summary {font-weight: 900;}'
+    '</style>'
+)
+
+
+_default_float = NumberFormatter(DEFAULT_PRECISION)
+
+
+def _default_cell(v):
+    if v is None or v is pd.NA or v is pd.NaT:
+        return ''
+    if isinstance(v, float):
+        return _default_float(v)
+    if isinstance(v, Real) and v != v:
+        return ''
+    return '{}'.format(v)
+
+
+def _default_format(values):
+    """Format an array without a user formatter."""
+    if is_nullable_numeric(values.dtype):
+        numbers, missing = numeric_values(values)
+        if numbers.dtype.kind == 'f':
+            out = _default_float.format_array(numbers)
+        else:
+            out = np.array([str(v) for v in numbers.tolist()], dtype=object)
+        out[missing] = ''
+        return out
+
+    kind = values.dtype.kind
+    if kind == 'f':
+        return _default_float.format_array(values)
+    if kind in 'iub':
+        return np.array([str(v) for v in values.tolist()], dtype=object)
+    if kind in 'mM':
+        # NumPy boxes datetime64[ns] values as integers
+        values = pd.Series(values).astype(object).values
+    return np.array([_default_cell(v) for v in values.tolist()],
+                    dtype=object)
+
+
+def format_values(func, values):
+    """Format an array of values to display strings with the function of a
+    Formatter.
+
+    :returns: Sequence of strings, one per value.
+    """
+    if hasattr(func, 'format_array'):
+        format_array = func.format_array
+    elif callable(func):
+        format_array = np.frompyfunc(func, 1, 1)
+    else:
+        format_array = np.frompyfunc(func.format, 1, 1)
+
+    formatted = format_array(values)
+    if not (hasattr(func, 'format_array') and
+            (values.dtype.kind in 'biuf' or
+             is_nullable_numeric(values.dtype))):
+        formatted = [v if isinstance(v, str) else _default_cell(v)
+                     for v in formatted]
+    return formatted
+
+
+def _apply_formatter(df, cells, formatter, rows, cols):
+    """Write the output of one Formatter into cells, in place."""
+    for j in cols:
+        cells[rows, j] = format_values(formatter.formatter,
+                                       df.iloc[rows, j].values)
+
+
+def format_frame(df, formatters=(), rows=None):
+    """Format the cells of a DataFrame to display strings.
+
+    Cells are formatted one column at a time. Columns start with a default
+    format and each Formatter then overwrites the cells it targets, so later
+    formatters take precedence like they do with ``Styler.format``. Columns
+    entirely covered by a formatter skip the default format. Missing values
+    are shown as empty strings.
+
+    Formatter subsets are resolved against the whole frame, so label based
+    subsets keep working when only some rows are formatted.
+
+    :param df: DataFrame to format.
+    :param formatters: Iterable of Formatter objects.
+    :param rows:
+        Optional array of row positions to format. Defaults to every row.
+    :returns: 2D NumPy object array of strings with one row per formatted
+        row and one column per column of ``df``.
+    """
+    if rows is None:
+        rows = np.arange(df.shape[0])
+    rows = np.asarray(rows, dtype='int64')
+
+    window = np.full(df.shape[0], -1, dtype='int64')
+    window[rows] = np.arange(len(rows))
+    view = df.iloc[rows]
+
+    targets = []
+    for formatter in formatters:
+        target_rows, target_cols = formatter.positions(df)
+        target_rows = window[target_rows]
+        target_rows = target_rows[target_rows >= 0]
+        targets.append((formatter, target_rows, target_cols))
+
+    covered = np.zeros(df.shape[1], dtype=bool)
+    for _, target_rows, target_cols in targets:
+        if len(np.unique(target_rows)) == len(rows):
+            covered[target_cols] = True
+
+    cells = np.empty((len(rows), df.shape[1]), dtype=object)
+    with stage('format:default'):
+        for j in np.flatnonzero(~covered):
+            cells[:, j] = _default_format(view.iloc[:, j].values)
+
+    for i, (formatter, target_rows, target_cols) in enumerate(targets):
+        with stage('formatter[{}]:{}'.format(
+                i, callable_name(formatter.formatter))):
+            _apply_formatter(view, cells, formatter, target_rows,
+                             target_cols)
+
+    return cells
+
+
+_SEP = '\x00'
+
+
+def _wrap_cells(values, opening, closing):
+    """Escape a list of strings and wrap each one in tags.
+
+    The values are joined and escaped as a single string so the work is
+    done by a few C level string operations instead of one call per cell.
+    """
+    if not values:
+        return []
+
+    text = _SEP.join(values)
+    if text.count(_SEP) != len(values) - 1:
+        return [opening + escape(v, quote=False) + closing for v in values]
+
+    text = escape(text, quote=False)
+    return (opening + text.replace(_SEP, closing + _SEP + opening) +
+            closing).split(_SEP)
+
+
+def _label(value):
+    if isinstance(value, tuple):
+        return [escape('{}'.format(v)) for v in value]
+    return [escape('{}'.format(value))]
+
+
+class HTMLRenderer(object):
+    """HTMLRenderer
+
+    Render a materialized frame as an HTML table without pandas Styler.
+    Summary rows and columns are marked with a ``summary`` class instead of
+    per-cell inline styles.
+
+    :param frame:
+        DataFrame including summary rows and columns.
+    :param cells:
+        2D array of display strings for ``frame``, see :func:`format_frame`.
+    :param summary_rows:
+        Boolean array marking summary rows.
+    :param summary_cols:
+        Boolean array marking summary columns.
+    :param ellipsis:
+        Optional row position before which an ``ellipsis`` row is inserted
+        to mark rows left out of ``frame``.
+    """
+
+    def __init__(self, frame, cells, summary_rows=None, summary_cols=None,
+                 ellipsis=None):
+        self.frame = frame
+        self.cells = cells
+        self.ellipsis = ellipsis
+
+        if summary_rows is None:
+            summary_rows = np.zeros(frame.shape[0], dtype=bool)
+        if summary_cols is None:
+            summary_cols = np.zeros(frame.shape[1], dtype=bool)
+
+        self.summary_rows = np.asarray(summary_rows, dtype=bool)
+        self.summary_cols = np.asarray(summary_cols, dtype=bool)
+
+    def _head(self):
+        columns = self.frame.columns
+        index_levels = self.frame.index.nlevels
+        summary_cols = self.summary_cols.tolist()
+
+        parts = ['<thead>']
+        for level in range(columns.nlevels):
+            if columns.nlevels > 1:
+                labels = columns.get_level_values(level)
+            else:
+                labels = columns
+
+            parts.append('<tr>')
+            parts.append('<th></th>' * index_levels)
+            for label, summary in zip(labels, summary_cols):
+                parts.append('<th class="summary">' if summary else '<th>')
+                parts.append(escape('{}'.format(label)))
+                parts.append('</th>')
+            parts.append('</tr>')
+
+        names = self.frame.index.names
+        if any(name is not None for name in names):
+            parts.append('<tr>')
+            for name in names:
+                parts.append('<th>{}</th>'.format(
+                    escape('{}'.format('' if name is None else name))))
+            parts.append('<th></th>' * len(columns))
+            parts.append('</tr>')
+
+        parts.append('</thead>')
+        return ''.join(parts)
+
+    def _body_rows(self, start, stop):
+        cells = self.cells[start:stop]
+        tagged = np.empty(cells.shape, dtype=object)
+
+        for j, summary in enumerate(self.summary_cols.tolist()):
+            opening = '<td class="summary">' if summary else '<td>'
+            tagged[:, j] = _wrap_cells(cells[:, j].tolist(), opening, '</td>')
+
+        index = self.frame.index[start:stop]
+        if index.nlevels == 1:
+            headings = _wrap_cells(['{}'.format(v) for v in index],
+                                   '<th>', '</th>')
+        else:
+            headings = [''.join('<th>' + text + '</th>'
+                                for text in _label(label))
+                        for label in index]
+
+        summary_rows = self.summary_rows[start:stop].tolist()
+
+        rows = []
+        for heading, summary, row in zip(headings, summary_rows,
+                                         tagged.tolist()):
+            rows.append(
+                ('<tr class="summary">' if summary else '<tr>') +
+                heading + ''.join(row) + '</tr>'
+            )
+
+        n = self.frame.shape[0]
+        if self.ellipsis is not None and (
+                start <= self.ellipsis < stop or self.ellipsis == stop >= n):
+            rows.insert(self.ellipsis - start, self._ellipsis_row())
+        return ''.join(rows)
+
+    def _ellipsis_row(self):
+        return (
+            '<tr class="ellipsis">' +
+            '<th>{}</th>'.format(ELLIPSIS) * self.frame.index.nlevels +
+            ''.join('<td class="summary">{}</td>'.format(ELLIPSIS)
+                    if summary else '<td>{}</td>'.format(ELLIPSIS)
+                    for summary in self.summary_cols.tolist()) +
+            '</tr>'
+        )
+
+    def render_body(self):
+        """Render only the ``<tr>`` elements of the table body"""
+        return self._body_rows(0, self.frame.shape[0])
+
+    def iter_chunks(self, chunk_rows=CHUNK_ROWS):
+        """Yield the HTML table as a sequence of strings.
+
+        :param chunk_rows: Number of table rows in each chunk.
+        """
+        yield STYLESHEET + '<table class="prettypandas">' + self._head()
+        yield '<tbody>'
+        for start in range(0, max(1, self.frame.shape[0]), chunk_rows):
+            yield self._body_rows(start, start + chunk_rows)
+        yield '</tbody></table>'
+
+    def render(self):
+        """Render the HTML table as a single string"""
+        return ''.join(self.iter_chunks(chunk_rows=max(1, len(self.frame))))
+
+
+#: Characters escaped in LaTeX output, with their replacements.
+_LATEX_ESCAPES = str.maketrans({
+    '\\': r'\textbackslash{}',
+    '&': r'\&',
+    '%': r'\%',
+    '$': r'\$',
+    '#': r'\#',
+    '_': r'\_',
+    '{': r'\{',
+    '}': r'\}',
+    '~': r'\textasciitilde{}',
+    '^': r'\textasciicircum{}',
+})
+
+
+_text_length = np.frompyfunc(len, 1, 1)
+
+
+def _pad(grid, left, minimum=0):
+    """Pad a 2D array of strings so each column is as wide as its longest
+    string. Each column is measured and padded on its own object array, so
+    a long cell only widens its own column.
+
+    :param grid: 2D object array of strings.
+    :param left: Number of leading columns aligned left; the others are
+        aligned right.
+    :param minimum: Minimum column width.
+    :returns: Tuple of the padded 2D object array and the column widths.
+    """
+    widths = np.full(grid.shape[1], minimum, dtype='int64')
+    padded = np.empty(grid.shape, dtype=object)
+    for j in range(grid.shape[1]):
+        column = grid[:, j]
+        if len(column):
+            widths[j] = max(minimum, _text_length(column).max())
+        pad = str.ljust if j < left else str.rjust
+        padded[:, j] = np.frompyfunc(pad, 2, 1)(column, widths[j])
+    return padded, widths
+
+
+def _mark(grid, mask, opening, closing):
+    """Wrap the non-empty strings of grid selected by mask, in place"""
+    mask = mask & (grid != '')
+    grid[mask] = opening + grid[mask] + closing
+
+
+class TextRenderer(object):
+    """TextRenderer
+
+    Render a materialized frame as plain text, Markdown or LaTeX from the
+    same display strings as :py:class:`HTMLRenderer`, without pandas Styler.
+    Column widths are computed with vectorized string length operations.
+    Summary rows and columns are shown in bold in Markdown and LaTeX.
+
+    :param frame:
+        DataFrame including summary rows and columns.
+    :param cells:
+        2D array of display strings for ``frame``, see :func:`format_frame`.
+    :param summary_rows:
+        Boolean array marking summary rows.
+    :param summary_cols:
+        Boolean array marking summary columns.
+    :param ellipsis:
+        Optional row position before which a row of ``...`` is inserted to
+        mark rows left out of ``frame``.
+    """
+
+    def __init__(self, frame, cells, summary_rows=None, summary_cols=None,
+                 ellipsis=None):
+        self.frame = frame
+        self.cells = cells
+        self.ellipsis = ellipsis
+
+        if summary_rows is None:
+            summary_rows = np.zeros(frame.shape[0], dtype=bool)
+        if summary_cols is None:
+            summary_cols = np.zeros(frame.shape[1], dtype=bool)
+
+        self.summary_rows = np.asarray(summary_rows, dtype=bool)
+        self.summary_cols = np.asarray(summary_cols, dtype=bool)
+
+    @property
+    def _levels(self):
+        return self.frame.index.nlevels
+
+    def _header(self, levels=True):
+        """Header rows as a 2D object array: one row per column level,
+        followed by a row of index names if the index is named. With
+        ``levels=False`` column levels and index names share one row."""
+        columns = self.frame.columns
+        names = ['' if name is None else '{}'.format(name)
+                 for name in self.frame.index.names]
+        labels = [['{}'.format(v) for v in columns.get_level_values(level)]
+                  for level in range(columns.nlevels)]
+
+        if not levels:
+            return np.array([names + [' '.join(parts).strip()
+                                      for parts in zip(*labels)]],
+                            dtype=object).reshape(1, -1)
+
+        rows = [[''] * self._levels + level for level in labels]
+        if any(names):
+            rows.append(names + [''] * len(columns))
+        return np.array(rows, dtype=object).reshape(len(rows), -1)
+
+    def _body(self, escape_cells=None, marks=None):
+        """Index labels and cells as a 2D object array, with the ellipsis
+        row inserted. Cells are passed through the ``escape_cells`` ufunc,
+        then summary cells are wrapped in ``marks``, a tuple of opening and
+        closing strings."""
+        index = self.frame.index
+        n = len(index)
+        body = np.empty((n, self._levels + self.frame.shape[1]),
+                        dtype=object)
+        for level in range(self._levels):
+            body[:, level] = ['{}'.format(v)
+                              for v in index.get_level_values(level)]
+        body[:, self._levels:] = self.cells
+
+        if escape_cells is not None:
+            body = escape_cells(body)
+        if marks is not None:
+            mask = np.zeros(body.shape, dtype=bool)
+            mask[self.summary_rows] = True
+            mask[:, self._levels:][:, self.summary_cols] = True
+            _mark(body, mask, *marks)
+
+        if self.ellipsis is not None:
+            body = np.insert(body, self.ellipsis, ELLIPSIS, axis=0)
+        return body
+
+    def render_text(self):
+        """Render the table as plain text aligned in columns, like the
+        string representation of a DataFrame"""
+        header = self._header()
+        grid, _ = _pad(np.concatenate([header, self._body()]), self._levels)
+        return '\n'.join('  '.join(row).rstrip() for row in grid.tolist())
+
+    def render_markdown(self):
+        """Render the table as a GitHub flavored Markdown table"""
+        escape_cells = np.frompyfunc(
+            lambda text: text.replace('|', '\\|'), 1, 1)
+        grid = np.concatenate([escape_cells(self._header(levels=False)),
+                               self._body(escape_cells, ('**', '**'))])
+        grid, widths = _pad(grid, self._levels, minimum=3)
+
+        rule = [':' + '-' * (w - 1) if j < self._levels else
+                '-' * (w - 1) + ':' for j, w in enumerate(widths.tolist())]
+        rows = grid.tolist()
+        lines = [rows[0], rule] + rows[1:]
+        return '\n'.join('| ' + ' | '.join(row) + ' |' for row in lines)
+
+    def render_latex(self):
+        """Render the table as a LaTeX ``tabular`` with booktabs rules"""
+        escape_cells = np.frompyfunc(
+            lambda text: text.translate(_LATEX_ESCAPES), 1, 1)
+        header = escape_cells(self._header())
+        body = self._body(escape_cells, (r'\textbf{', '}'))
+
+        spec = 'l' * self._levels + 'r' * self.frame.shape[1]
+        lines = ['\\begin{tabular}{' + spec + '}', '\\toprule']
+        lines += [' & '.join(row) + ' \\\\' for row in header.tolist()]
+        lines.append('\\midrule')
+        lines += [' & '.join(row) + ' \\\\' for row in body.tolist()]
+        lines += ['\\bottomrule', '\\end{tabular}']
+        return '\n'.join(lines)
@@ -0,0 +1,304 @@
+from __future__ import unicode_literals
+
+import operator
+
+import numpy as np
+import pandas as pd
+
+from .aggregation import reduce_frame
+
+
+#: Reductions that can be computed exactly from running statistics.
+EXACT_REDUCTIONS = frozenset(['sum', 'mean', 'min', 'max', 'count', 'var',
+                              'std'])
+
+#: Reductions that can be computed from a stream of chunks.
+STREAMING_REDUCTIONS = EXACT_REDUCTIONS | frozenset(['median'])
+
+#: Default number of centroids kept per column by QuantileSketch.
+SKETCH_SIZE = 512
+
+
+class QuantileSketch(object):
+    """QuantileSketch
+
+    Mergeable approximate quantile sketch for a single column.
+
+    Values are kept as weighted centroids. When the number of centroids
+    exceeds ``size`` neighbouring centroids are merged into equal-weight
+    buckets, so memory stays bounded no matter how much data is added.
+
+    :param size:
+        Maximum number of centroids to keep.
+    """
+
+    def __init__(self, size=SKETCH_SIZE):
+        self.size = size
+        self.means = np.empty(0, dtype='float64')
+        self.weights = np.empty(0, dtype='float64')
+
+    def update(self, values):
+        """Add an array of values, ignoring missing values"""
+        values = np.asarray(values, dtype='float64')
+        values = values[~np.isnan(values)]
+        self._add(values, np.ones(len(values)))
+        return self
+
+    def merge(self, other):
+        """Add the centroids of another sketch"""
+        self._add(other.means, other.weights)
+        return self
+
+    def _add(self, means, weights):
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+
+        order = np.argsort(means, kind='mergesort')
+        means, weights = means[order], weights[order]
+
+        if len(means) > self.size:
+            cumulative = np.cumsum(weights) - weights / 2
+            buckets = (cumulative / cumulative[-1] * self.size).astype('int64')
+            buckets = np.minimum(buckets, self.size - 1)
+
+            bucket_weights = np.bincount(buckets, weights=weights)
+            bucket_sums = np.bincount(buckets, weights=means * weights)
+            keep = bucket_weights > 0
+
+            weights = bucket_weights[keep]
+            means = bucket_sums[keep] / weights
+
+        self.means, self.weights = means, weights
+
+    def quantile(self, q):
+        """Approximate quantile ``q`` between 0 and 1"""
+        if not len(self.means):
+            return np.nan
+
+        cumulative = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(q * self.weights.sum(), cumulative,
+                               self.means))
+
+
+def _python(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _combine_values(left, right, func):
+    """Combine two Series of numbers by label with func, ignoring missing
+    values. Values are kept as Python numbers, so integers are combined
+    without rounding or overflow."""
+    left, right = left.align(right)
+    values = []
+    for a, b in zip(map(_python, left.tolist()), map(_python, right.tolist())):
+        if pd.isna(a):
+            values.append(b)
+        elif pd.isna(b):
+            values.append(a)
+        else:
+            values.append(func(a, b))
+    return pd.Series(values, index=left.index, dtype=object)
+
+
+def _numbers(result):
+    """Series of Python numbers as float64, unless it holds integers"""
+    if any(isinstance(v, int) for v in result.tolist()):
+        return result
+    return result.astype('float64')
+
+
+class ColumnStats(object):
+    """ColumnStats
+
+    Mergeable running statistics for the numeric columns of a stream of
+    DataFrames, along with the number of values of every column. Only
+    per-column state is kept, so memory does not grow with the number of
+    rows. Means and variances are tracked with Welford's algorithm and
+    merged with Chan's parallel update.
+
+    :param sketch_size:
+        Number of centroids kept per column for approximate medians, or
+        ``None`` to skip median tracking.
+    """
+
+    #: Reductions answered exactly, without approximation.
+    exact_reductions = EXACT_REDUCTIONS
+
+    def __init__(self, sketch_size=SKETCH_SIZE):
+        self.sketch_size = sketch_size
+        self.columns = pd.Index([])
+        self.rows = 0
+
+        self.count = pd.Series(dtype='int64')
+        self.sum = pd.Series(dtype=object)
+        self.min = pd.Series(dtype=object)
+        self.max = pd.Series(dtype=object)
+        self.mean = pd.Series(dtype='float64')
+        self.m2 = pd.Series(dtype='float64')
+        self.sketches = {}
+        self.booleans = pd.Index([])
+
+    def copy(self):
+        """Return an independent copy of these statistics"""
+        new = self.__class__(self.sketch_size)
+        return new.merge(self)
+
+    def update(self, chunk):
+        """Add a DataFrame chunk to the running statistics"""
+        self.columns = self.columns.append(
+            chunk.columns.difference(self.columns, sort=False))
+        self.rows += len(chunk)
+
+        numeric = chunk.select_dtypes(include=[np.number, 'bool', 'boolean'])
+        if not len(numeric):
+            # Values are counted in every column, whatever its dtype
+            return self._combine({'count': chunk.count()}, {})
+
+        # Booleans are tracked as integers, like pandas sums them
+        booleans = numeric.select_dtypes(include=['bool', 'boolean']).columns
+        if len(booleans):
+            self.booleans = self.booleans.union(booleans, sort=False)
+            numeric = numeric.astype({
+                name: 'int64' if numeric[name].dtype == bool else 'Int64'
+                for name in booleans})
+
+        reduced = reduce_frame(numeric, ['sum', 'mean', 'min', 'max'])
+        reduced['count'] = chunk.count()
+        reduced['m2'] = ((numeric - reduced['mean']) ** 2).sum()
+
+        sketches = {}
+        if self.sketch_size is not None:
+            for name, column in numeric.items():
+                sketches[name] = QuantileSketch(
+                    self.sketch_size).update(column)
+
+        return self._combine(reduced, sketches)
+
+    def add(self, columns, rows, reduced, sketches=None):
+        """Add statistics reduced elsewhere, e.g. from a Parquet row group.
+
+        :param columns: Labels of every column the statistics cover.
+        :param rows: Number of rows the statistics were computed from.
+        :param reduced: dict of ``count``, ``sum``, ``mean``, ``min``,
+            ``max`` and ``m2`` (sum of squared differences from the mean)
+            Series indexed by numeric column. ``count`` may also cover
+            other columns, and the other keys may be left out when only
+            values are counted.
+        :param sketches: Optional dict of QuantileSketch by column.
+        """
+        self.columns = self.columns.append(
+            pd.Index(columns).difference(self.columns, sort=False))
+        self.rows += rows
+        return self._combine(reduced, sketches or {})
+
+    def merge(self, other):
+        """Add the statistics of another ColumnStats"""
+        self.columns = self.columns.append(
+            other.columns.difference(self.columns, sort=False))
+        self.rows += other.rows
+        self.booleans = self.booleans.union(other.booleans, sort=False)
+
+        reduced = {'sum': other.sum, 'min': other.min, 'max': other.max,
+                   'count': other.count, 'mean': other.mean, 'm2': other.m2}
+        return self._combine(reduced, other.sketches)
+
+    def _combine(self, reduced, sketches):
+        empty = pd.Series(dtype='float64')
+        mean = reduced.get('mean', empty)
+
+        # Means and variances only cover the columns with numeric statistics
+        numeric = self.mean.index.union(mean.index, sort=False)
+        count_a = self.count.reindex(numeric, fill_value=0).astype('float64')
+        count_b = reduced['count'].reindex(numeric, fill_value=0) \
+            .astype('float64')
+        count = count_a + count_b
+
+        mean_a, mean_b = self.mean.reindex(numeric), mean.reindex(numeric)
+        m2_a = self.m2.reindex(numeric)
+        m2_b = reduced.get('m2', empty).reindex(numeric)
+        delta = mean_b.fillna(0) - mean_a.fillna(0)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.mean = (mean_a.fillna(0) +
+                         delta * count_b / count).where(count > 0)
+            self.m2 = (m2_a.fillna(0) + m2_b.fillna(0) +
+                       delta ** 2 * count_a * count_b / count
+                       ).where(count > 0)
+
+        # Sums and extremes of integer columns stay exact integers
+        self.sum = _combine_values(self.sum, reduced.get('sum', empty),
+                                   operator.add)
+        self.min = _combine_values(self.min, reduced.get('min', empty), min)
+        self.max = _combine_values(self.max, reduced.get('max', empty), max)
+        self.count = self.count.add(reduced['count'], fill_value=0) \
+            .astype('int64')
+
+        for name, sketch in sketches.items():
+            if name in self.sketches:
+                self.sketches[name].merge(sketch)
+            else:
+                self.sketches[name] = QuantileSketch(
+                    self.sketch_size).merge(sketch)
+
+        return self
+
+    def _boolean_results(self, result, name):
+        """Convert the sums of boolean columns to integers and their
+        extremes back to booleans, as pandas reduces them"""
+        booleans = result.index.isin(self.booleans) & result.notna().values
+        if not booleans.any():
+            return result
+        values = result.values.astype(object)
+        values[booleans] = result.values[booleans].astype(
+            'int64' if name == 'sum' else bool)
+        return pd.Series(values, index=result.index, name=result.name)
+
+    def covers(self, name, columns):
+        """Check whether the statistics hold reduction name for every
+        column of columns"""
+        known = self.columns if name == 'count' else self.mean.index
+        return bool(pd.Index(columns).isin(known).all())
+
+    def reduce(self, funcs, columns=None):
+        """Compute named reductions from the running statistics.
+
+        :param funcs: Iterable of names in ``STREAMING_REDUCTIONS``.
+        :param columns: Columns to report. Defaults to every column seen.
+            Columns without numeric statistics are reported as NaN, except
+            for ``count``.
+        :returns: dict mapping each name to a Series.
+        """
+        if columns is None:
+            columns = self.columns
+
+        supported = self.exact_reductions
+        if self.sketch_size is not None:
+            supported = supported | (STREAMING_REDUCTIONS - EXACT_REDUCTIONS)
+        unsupported = set(funcs) - supported
+        if unsupported:
+            raise ValueError(
+                "Cannot compute {} from chunks.".format(
+                    ', '.join(sorted(unsupported)))
+            )
+
+        results = {}
+        for name in funcs:
+            if name == 'var':
+                result = self.m2 / (self.count - 1).where(self.count > 1)
+            elif name == 'std':
+                result = np.sqrt(self.m2 / (self.count - 1).where(
+                    self.count > 1))
+            elif name == 'median':
+                result = pd.Series({c: s.quantile(0.5)
+                                    for c, s in self.sketches.items()},
+                                   dtype='float64')
+            elif name in ('sum', 'min', 'max'):
+                result = _numbers(getattr(self, name).reindex(columns))
+            else:
+                result = getattr(self, name)
+            result = result.reindex(columns)
+            if name in ('sum', 'min', 'max'):
+                result = self._boolean_results(result, name)
+            results[name] = result
+
+        return results
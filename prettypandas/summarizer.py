@@ -1,8 +1,26 @@
 from __future__ import unicode_literals
 
+from contextlib import nullcontext
+import copy
+import hashlib
 from operator import methodcaller
+import numpy as np
 import pandas as pd
-from .formatters import as_percent, as_currency, as_unit, LOCALE_OBJ
+from pandas.api.types import is_list_like
+from .aggregation import (apply_aggregates, apply_subtotals, check_executor,
+                          executor_scope)
+from .assembly import (SummaryView, assemble, interleave_rows,
+                       summary_cols_frame, summary_rows_frame)
+from .backends import (from_dask, from_polars, is_dask_frame,
+                       is_polars_frame)
+from .cache import DataDigest, data_fingerprint, frame_cache, html_cache
+from .streaming import ColumnStats, SKETCH_SIZE
+from .formatters import as_percent, as_currency, as_unit
+from .plan import (Plan, explain, freeze, live_formatters, token,
+                   optimize_aggregates)
+from .profiling import (Profiler, active_profiler, callable_name,
+                        instrument_styler, stage)
+from .render import PAGE_SIZE, HTMLRenderer, TextRenderer, format_frame
 
 
 def _axis_is_rows(axis):
@@ -13,6 +31,20 @@ def _axis_is_cols(axis):
     return axis == 1 or axis == 'columns' or axis == 'index'
 
 
+def _non_reducing_slice(subset):
+    """Convert a Styler subset to a ``.loc`` key that always selects a
+    DataFrame, following the same rules as pandas Styler."""
+    if not isinstance(subset, tuple):
+        subset = (slice(None), subset)
+
+    def listify(part):
+        if isinstance(part, slice) or is_list_like(part):
+            return part
+        return [part]
+
+    return tuple(listify(part) for part in subset)
+
+
 class Aggregate(object):
     """Aggreagte
 
@@ -45,24 +77,126 @@ class Aggregate(object):
         self.title = title
         self.subset = subset
         self.axis = axis
+        self.columns = None
 
         self.func = func
         self.args = args
         self.kwargs = kwargs
 
-    def apply(self, df):
-        """Compute aggregate over DataFrame"""
+    @property
+    def is_named_reduction(self):
+        """True if func is a reduction name such as ``'sum'`` with no extra
+        arguments, which lets it be batched with other aggregates."""
+        return (
+            isinstance(self.func, str)
+            and not self.args
+            and not self.kwargs
+        )
 
-        if self.subset:
+    def select(self, df):
+        """Return the part of the DataFrame this aggregate is computed on"""
+        if self.subset is not None:
             if _axis_is_rows(self.axis):
                 df = df[self.subset]
             if _axis_is_cols(self.axis):
                 df = df.loc[self.subset]
+        if self.columns is not None:
+            df = df[self.columns]
+        return df
 
+    def reduce(self, df):
+        """Compute aggregate over an already selected DataFrame"""
         result = df.agg(self.func, axis=self.axis, *self.args, **self.kwargs)
         result.name = self.title
         return result
 
+    def apply(self, df):
+        """Compute aggregate over DataFrame"""
+        return self.reduce(self.select(df))
+
+    def _replace(self, **attrs):
+        new = copy.copy(self)
+        new.__dict__.update(attrs)
+        return new
+
+    def with_title(self, title):
+        """Return a copy of this aggregate with another title"""
+        return self._replace(title=title)
+
+    def with_subset(self, subset):
+        """Return a copy of this aggregate with another subset"""
+        return self._replace(subset=subset)
+
+    def with_columns(self, columns):
+        """Return a copy of this aggregate only computed over columns"""
+        return self._replace(columns=columns)
+
+    @property
+    def key(self):
+        """Hashable key identifying the values this aggregate computes,
+        ignoring its title. Aggregates with unhashable arguments are only
+        equal to themselves."""
+        try:
+            return freeze((type(self).__name__, self.func, self.subset,
+                           self.columns, self.axis, self.args, self.kwargs,
+                           getattr(self, 'level', None)))
+        except TypeError:
+            return id(self)
+
+    def __eq__(self, other):
+        return (isinstance(other, Aggregate) and
+                self.title == other.title and self.key == other.key)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.title, self.key))
+
+    def describe_func(self):
+        """Short description of the function of this aggregate"""
+        if isinstance(self.func, str):
+            return self.func
+        return callable_name(self.func)
+
+    def describe(self):
+        """One line description of this aggregate"""
+        subset = '' if self.subset is None else \
+            ' on {!r}'.format(self.subset)
+        return '{!r}: {}{}'.format(self.title, self.describe_func(), subset)
+
+
+class Subtotal(Aggregate):
+    """Subtotal
+
+    Wrapper to calculate a subtotal row for every group of a MultiIndex
+    level.
+
+    :param title:
+        Subtotal row title
+    :param func:
+        Function to be passed to GroupBy.agg
+    :param level:
+        Index level, by position or name, whose groups are subtotalled
+    :param subset:
+        Subset of columns to compute subtotals on
+
+    :param args:
+        Positionsal arguments to GroupBy.agg
+    :param kwargs:
+        Keyword arguments to GroupBy.agg
+    """
+
+    def __init__(self, title, func, level=0, subset=None, *args, **kwargs):
+        super(Subtotal, self).__init__(title, func, subset, 0,
+                                       *args, **kwargs)
+        self.level = level
+
+    def describe(self):
+        """One line description of this subtotal"""
+        return '{} at level {!r}'.format(
+            super(Subtotal, self).describe(), self.level)
+
 
 class Formatter(object):
     """Formatter
@@ -82,9 +216,59 @@ class Formatter(object):
         self.args = args
         self.kwargs = kwargs
 
+    def _target(self, df):
+        """Return the cells of df this formatter applies to as a DataFrame"""
+        subset = self.kwargs.get('subset')
+        if subset is None:
+            return df
+        return df.loc[_non_reducing_slice(subset)]
+
+    def positions(self, df):
+        """Return integer row and column positions of the cells of df this
+        formatter applies to, without copying any data"""
+        rows = np.arange(df.shape[0])
+        cols = np.arange(df.shape[1])
+
+        subset = self.kwargs.get('subset')
+        if subset is None:
+            return rows, cols
+
+        row_key, col_key = _non_reducing_slice(subset)
+        rows = pd.Series(rows, index=df.index).loc[row_key].values
+        cols = pd.Series(cols, index=df.columns).loc[col_key].values
+        return rows, cols
+
+    @property
+    def key(self):
+        """Hashable key identifying this formatter. Formatters with
+        unhashable arguments are only equal to themselves."""
+        try:
+            return freeze((self.formatter, self.args, self.kwargs))
+        except TypeError:
+            return id(self)
+
+    def __eq__(self, other):
+        return isinstance(other, Formatter) and self.key == other.key
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def describe(self):
+        """One line description of this formatter"""
+        subset = self.kwargs.get('subset')
+        return '{}{}'.format(
+            callable_name(self.formatter),
+            '' if subset is None else ' on {!r}'.format(subset))
+
     def apply(self, styler):
         """Apply Summary over Pandas Styler"""
-        return styler.format(self.formatter, *self.args, **self.kwargs)
+        formatter = self.formatter
+        if hasattr(formatter, 'lookup'):
+            formatter = formatter.lookup(self._target(styler.data))
+        return styler.format(formatter, *self.args, **self.kwargs)
 
 
 class PrettyPandas(object):
@@ -92,13 +276,42 @@ class PrettyPandas(object):
 
     Parameters
     ----------
-    :param data: DataFrame.
+    :param data: DataFrame. Dask and Polars DataFrames are accepted too,
+        see :py:meth:`from_dask` and :py:meth:`from_polars`.
     :param summary_rows:
         list of Aggregate objects to be appended as a summary.
     :param summary_cols:
         list of Aggregate objects to be appended as a summary.
     :param formatters:
         List of Formatter objects to format.
+    :param cache:
+        :py:class:`LRUCache <prettypandas.cache.LRUCache>` used to store
+        materialized frames. Copies made by chaining share the same cache.
+    :param stats:
+        :py:class:`ColumnStats <prettypandas.streaming.ColumnStats>` for the
+        full data. Used when ``data`` only holds the rows to display, see
+        :py:meth:`from_chunks`, and to update summaries incrementally, see
+        :py:meth:`append`.
+    :param executor:
+        ``concurrent.futures.Executor`` used to evaluate summaries in
+        parallel, or ``'thread'``/``'process'`` to create a pool for each
+        evaluation. Threads suit NumPy based functions, which release the
+        GIL; processes suit pure Python functions, which must be picklable.
+    :param subtotals:
+        list of Subtotal objects to be interleaved with the data.
+    :param profile:
+        ``True`` or a :py:class:`Profiler <prettypandas.profiling.Profiler>`
+        to record the time and memory of every stage of computing and
+        rendering this table, see :py:attr:`profiler`. Copies made by
+        chaining share the same profiler.
+    :param render_cache:
+        Cache of HTML returned by :py:meth:`render`, keyed by a digest of
+        every value of the data and the plan, so unchanged tables are served
+        without recomputation. ``True`` for an in-memory
+        :py:func:`html_cache <prettypandas.cache.html_cache>`, or a
+        :py:class:`DiskCache <prettypandas.cache.DiskCache>` to share
+        rendered tables between processes. Copies made by chaining share the
+        same cache.
     """
 
     def __init__(self,
@@ -106,136 +319,769 @@ class PrettyPandas(object):
                  summary_rows=None,
                  summary_cols=None,
                  formatters=None,
+                 cache=None,
+                 stats=None,
+                 executor=None,
+                 subtotals=None,
+                 profile=None,
+                 render_cache=None,
                  *args,
                  **kwargs):
 
+        if stats is None and is_dask_frame(data):
+            data, stats = from_dask(data)
+        elif stats is None and is_polars_frame(data):
+            data, stats = from_polars(data)
+
         self.data = data
-        self.summary_rows = summary_rows or []
-        self.summary_cols = summary_cols or []
-        self.formatters = formatters or []
-
-    def _copy(self):
-        return self.__class__(
-            self.data,
-            summary_rows=self.summary_rows[:],
-            summary_cols=self.summary_cols[:],
-            formatters=self.formatters[:],
+        self.plan = Plan.build(
+            summary_rows=summary_rows,
+            summary_cols=summary_cols,
+            formatters=formatters,
+            subtotals=subtotals,
         )
+        self.cache = cache if cache is not None else frame_cache()
+        self.stats = stats
+        self.executor = check_executor(executor)
+        self._subtotalled = None
+
+        if profile is True:
+            profile = Profiler()
+        self.profiler = profile or None
+
+        if render_cache is True:
+            render_cache = html_cache()
+        self.render_cache = render_cache
+        self._digest = None
+
+    @classmethod
+    def from_chunks(cls, chunks, head=10, sketch_size=SKETCH_SIZE, **kwargs):
+        """Create a table from an iterable of DataFrames.
+
+        Summary rows are computed incrementally from every chunk, but only
+        the first ``head`` rows are kept for display, so data larger than
+        memory can be summarized, e.g. from ``pd.read_csv(chunksize=...)``.
+
+        Summary rows support ``sum``, ``mean``, ``min``, ``max`` and an
+        approximate ``median`` over numeric columns, and ``count`` over
+        every column. Summary columns
+        are computed over the displayed rows only.
+
+        :param chunks: Iterable of DataFrames with the same columns.
+        :param head: Number of rows to keep for display.
+        :param sketch_size:
+            Centroids kept per column for approximate medians.
+        :param kwargs: Keyword arguments passed to PrettyPandas.
+        """
+        stats = ColumnStats(sketch_size)
+
+        rows, kept = [], 0
+        for chunk in chunks:
+            stats.update(chunk)
+            if kept < head or not rows:
+                # The first chunk is always kept, if only for its dtypes
+                rows.append(chunk.iloc[:max(head - kept, 0)])
+                kept += len(rows[-1])
+
+        if rows:
+            data = pd.concat(rows, axis=0)
+        else:
+            data = pd.DataFrame(columns=stats.columns)
 
-    def _add_formatter(self, formatter):
-        new = self._copy()
-        new.formatters += [formatter]
+        return cls(data, stats=stats, **kwargs)
+
+    @classmethod
+    def from_dask(cls, frame, head=10, scheduler=None, **kwargs):
+        """Create a table from a Dask DataFrame.
+
+        Only the first ``head`` rows are computed for display. Summary rows
+        are computed over the whole frame, with every built-in reduction of
+        the table evaluated together in one ``dask.compute``; see
+        :py:class:`DaskStats <prettypandas.backends.DaskStats>`. Summary
+        columns and custom summaries are computed over the displayed rows,
+        as in :py:meth:`from_chunks`.
+
+        Passing a Dask DataFrame to ``PrettyPandas`` calls this method with
+        the default arguments.
+
+        :param frame: Dask DataFrame.
+        :param head: Number of rows to keep for display.
+        :param scheduler: Scheduler passed to ``dask.compute``.
+        :param kwargs: Keyword arguments passed to PrettyPandas.
+        """
+        data, stats = from_dask(frame, head, scheduler)
+        return cls(data, stats=stats, **kwargs)
+
+    @classmethod
+    def from_polars(cls, frame, head=10, **kwargs):
+        """Create a table from a Polars DataFrame or LazyFrame.
+
+        Only the first ``head`` rows are collected and converted to pandas
+        for display and formatting. Summary rows are computed over the whole
+        frame, with every built-in reduction of the table evaluated by one
+        ``select`` of lazy expressions; see
+        :py:class:`PolarsStats <prettypandas.backends.PolarsStats>`. Summary
+        columns and custom summaries are computed over the displayed rows,
+        as in :py:meth:`from_chunks`.
+
+        Passing a Polars frame to ``PrettyPandas`` calls this method with the
+        default arguments.
+
+        :param frame: Polars DataFrame or LazyFrame.
+        :param head: Number of rows to keep for display.
+        :param kwargs: Keyword arguments passed to PrettyPandas.
+        """
+        data, stats = from_polars(frame, head)
+        return cls(data, stats=stats, **kwargs)
+
+    @classmethod
+    def from_parquet(cls, path, columns=None, head=10, summaries=None,
+                     sketch_size=SKETCH_SIZE, **kwargs):
+        """Create a table from a Parquet file without loading it.
+
+        Only the first ``head`` rows of ``columns`` are read into a
+        DataFrame. ``min``, ``max`` and ``summary('count')`` summary rows
+        are answered from the row group statistics of the file when
+        ``summaries`` only lists those; other summary rows are computed one
+        row group at a time, as in :py:meth:`from_chunks`. Requires
+        ``pyarrow``.
+
+        .. code-block:: python
+
+            (PrettyPandas.from_parquet('sales.parquet', columns=['a', 'b'],
+                                       summaries=['min', 'max'])
+             .min()
+             .max())
+
+        :param path: Path of the Parquet file.
+        :param columns: Columns to read. Defaults to every data column.
+        :param head: Number of rows to keep for display.
+        :param summaries:
+            Names of the reductions the summary rows will use, from
+            ``sum``, ``mean``, ``min``, ``max``, ``count``, ``var``, ``std``
+            and ``median``. Defaults to all of them, which reads every row
+            group of the projected columns.
+        :param sketch_size:
+            Centroids kept per column for approximate medians.
+        :param kwargs: Keyword arguments passed to PrettyPandas.
+        """
+        from .parquet import read_parquet
+
+        data, stats = read_parquet(path, columns, head, summaries,
+                                   sketch_size)
+        return cls(data, stats=stats, **kwargs)
+
+    def _copy(self, **attrs):
+        """Return a copy sharing the data, plan, cache and profiler, with
+        attrs replaced. The plan is immutable, so nothing is sliced."""
+        new = self.__class__.__new__(self.__class__)
+        new.__dict__.update(self.__dict__)
+        new._subtotalled = None
+        if 'data' in attrs:
+            new._digest = None
+        new.__dict__.update(attrs)
         return new
 
-    def _add_summary(self, agg):
-        new = self._copy()
+    @property
+    def summary_rows(self):
+        """List of Aggregate objects appended as summary rows"""
+        return list(self.plan.ops('summary_rows'))
+
+    @property
+    def summary_cols(self):
+        """List of Aggregate objects appended as summary columns"""
+        return list(self.plan.ops('summary_cols'))
+
+    @property
+    def formatters(self):
+        """List of Formatter objects"""
+        return list(self.plan.ops('formatters'))
 
+    @property
+    def subtotals(self):
+        """List of Subtotal objects interleaved with the data"""
+        return list(self.plan.ops('subtotals'))
+
+    def _profiling(self):
+        """Context manager activating this table's profiler, if any"""
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler
+
+    def _add_formatter(self, formatter):
+        return self._copy(plan=self.plan.add('formatters', formatter))
+
+    def _add_summary(self, agg):
         if _axis_is_rows(agg.axis):
-            new.summary_rows += [agg]
+            kind = 'summary_rows'
         elif _axis_is_cols(agg.axis):
-            new.summary_cols += [agg]
+            kind = 'summary_cols'
         else:
             raise ValueError("Invalid axis supplied.")
 
-        return new
-
-    def _cleaned_aggregates(self, summaries):
-        titles = set()
-        for agg in summaries:
-            title = agg.title
-            i = 1
-            while agg.title in titles:
-                agg.title = "{}_{}".format(title, i)
-                i += 1
-
-            titles.add(agg.title)
-            yield agg
+        return self._copy(plan=self.plan.add(kind, agg))
 
     @property
     def _cleaned_summary_rows(self):
-        return list(self._cleaned_aggregates(self.summary_rows))
+        return self.plan.titled('summary_rows')
 
     @property
     def _cleaned_summary_cols(self):
-        return list(self._cleaned_aggregates(self.summary_cols))
+        return self.plan.titled('summary_cols')
 
-    def _apply_summaries(self):
-        """Add all summary rows and columns."""
+    def explain(self):
+        """Describe the summaries and formatters of this table and how they
+        are evaluated: which aggregates are batched or merged, which subsets
+        are pushed down and which formatters are dropped.
 
-        def as_frame(r):
-            if isinstance(r, pd.Series):
-                return r.to_frame()
-            else:
-                return r
+        :returns: Multi-line string.
+        """
+        frame = self.cache.get(self._cache_key())
+        return explain(self.plan, self.data, frame)
+
+    def _with_subtotals(self):
+        """Data with subtotal rows interleaved, and a boolean array marking
+        the subtotal rows."""
+        if self._subtotalled is not None:
+            return self._subtotalled
+
+        subtotals = self.plan.ops('subtotals')
+        if not subtotals:
+            self._subtotalled = interleave_rows(self.data, [])
+            return self._subtotalled
+
+        with stage('subtotals'):
+            results = apply_subtotals(self.data, subtotals)
+
+        # Deeper levels come first so each subtotal directly follows the
+        # subtotals of its own subgroups.
+        order = sorted(
+            range(len(subtotals)),
+            key=lambda i: -self.data.index._get_level_number(
+                subtotals[i].level),
+        )
 
+        with stage('interleave'):
+            self._subtotalled = interleave_rows(
+                self.data, [results[i] for i in order])
+        return self._subtotalled
+
+    def _summary_labels(self, titles):
+        """Index for summary rows, padded to the levels of the data index"""
+        index = self.data.index
+        if index.nlevels == 1:
+            return pd.Index(titles)
+
+        padding = ('',) * (index.nlevels - 1)
+        return pd.MultiIndex.from_tuples(
+            [(title,) + padding for title in titles], names=index.names)
+
+    def _summary_frames(self, previous=None):
+        """Compute summary rows and columns as separate frames.
+
+        Summary rows are computed over the data only. Summary columns are
+        computed over the data and subtotal rows.
+
+        :param previous:
+            Materialized frame of a table whose data is a prefix of this
+            table's data. Summary column values are reused for the rows it
+            already covers, so only new rows are summarized. Ignored when
+            there are subtotals.
+        :returns: Tuple of summary rows and summary columns frames, either
+            of which is None when there are no summaries on that axis.
+        """
         df = self.data
 
-        if df.index.nlevels > 1:
-            raise ValueError(
-                "You cannot currently have both summary rows and columns on a "
-                "MultiIndex."
-            )
+        rows = cols = None
+        with executor_scope(self.executor) as executor:
+            if self.summary_rows:
+                with stage('summary_rows'):
+                    rows = summary_rows_frame(
+                        self._evaluate('summary_rows', df, stats=self.stats,
+                                       executor=executor),
+                        df.columns,
+                        df.dtypes,
+                    )
+                    rows.index = self._summary_labels(list(rows.index))
+
+            if self.summary_cols:
+                df, _ = self._with_subtotals()
+                _df, known = df, None
+                if previous is not None and not self.subtotals:
+                    known = previous.iloc[
+                        :len(previous) - len(self.summary_rows),
+                        -len(self.summary_cols):
+                    ]
+                    _df = df.iloc[len(known):]
+
+                with stage('summary_cols'):
+                    cols = pd.concat(
+                        self._evaluate('summary_cols', _df,
+                                       executor=executor),
+                        axis=1,
+                    )
+                    if known is not None:
+                        cols = pd.concat([known, cols], axis=0)
+                    cols = summary_cols_frame([cols[c] for c in cols],
+                                              df.index, df.dtypes)
+
+        return rows, cols
+
+    def _evaluate(self, kind, df, **kwargs):
+        """Evaluate the summary rows or columns of the plan over df.
+
+        The aggregates are optimized first, so aggregates computing the
+        same values are only evaluated once.
+
+        :param kwargs: Keyword arguments passed to apply_aggregates.
+        :returns: List of Series, one per aggregate.
+        """
+        aggregates = self.plan.titled(kind)
+        unique, positions = optimize_aggregates(aggregates, df)
+        results = apply_aggregates(df, unique, **kwargs)
 
-        _df = df
-        if self.summary_rows:
-            rows = pd.concat([agg.apply(_df)
-                              for agg in self._cleaned_summary_rows], axis=1).T
-            df = pd.concat([df, as_frame(rows)], axis=0)
+        return [
+            results[p] if results[p].name == agg.title
+            else results[p].rename(agg.title)
+            for agg, p in zip(aggregates, positions)
+        ]
 
-        if self.summary_cols:
-            cols = pd.concat([agg.apply(_df)
-                              for agg in self._cleaned_summary_cols], axis=1)
-            df = pd.concat([df, as_frame(cols)], axis=1)
+    def _apply_summaries(self, previous=None):
+        """Add all summary rows and columns."""
+        with self._profiling():
+            rows, cols = self._summary_frames(previous=previous)
+            data, _ = self._with_subtotals()
+            with stage('assemble'):
+                return assemble(data, rows, cols)
 
-        return df
+    def _cache_key(self):
+        return (self.plan.summary_key(), data_fingerprint(self.data))
+
+    def _materialize(self):
+        """Return the summarized frame, reusing a cached copy if possible.
+
+        The returned frame is shared through the cache and must not be
+        modified in place.
+        """
+        with self._profiling(), stage('materialize'):
+            key = self._cache_key()
+            df = self.cache.get(key)
+            if df is None:
+                df = self.cache.set(key, self._apply_summaries())
+            return df
+
+    def _running_stats(self):
+        """Running statistics for the data, computing them if needed"""
+        if self.stats is not None:
+            return self.stats
+        return ColumnStats(sketch_size=None).update(self.data)
+
+    def append(self, rows):
+        """Append rows to the data and update summaries incrementally.
+
+        Summary rows built from ``total``, ``average``, ``min``, ``max``,
+        ``summary('count')``, ``summary('var')`` and ``summary('std')`` are
+        updated from running statistics without rescanning the existing
+        data. Summary columns are only computed for the new rows when this
+        table has already been materialized. Other summaries fall back to a
+        full recomputation.
+
+        :param rows: DataFrame of rows to append.
+        :returns: New PrettyPandas containing the appended rows.
+        """
+        data = pd.concat([self.data, rows], axis=0)
+        digest = None
+        if self._digest is not None and \
+                list(data.dtypes) == list(self.data.dtypes) and \
+                data.index.dtype == self.data.index.dtype:
+            digest = self._digest.copy()
+        return self._extend(data, rows, digest)
+
+    def _extend(self, data, rows, digest=None):
+        """Return a copy using data, which is the current data followed by
+        rows, updating summaries incrementally.
+
+        :param digest: Optional DataDigest of the rows of data before rows,
+            extended with rows to give the digest of the new table.
+        """
+        stats = self._running_stats().copy().update(rows)
+
+        new = self._copy(data=data, stats=stats)
+        if digest is not None:
+            new._digest = digest.update(rows)
+
+        previous = self.cache.get(self._cache_key())
+        if previous is not None:
+            new.cache.set(new._cache_key(),
+                          new._apply_summaries(previous=previous))
+        return new
+
+    def update(self, new_data):
+        """Replace the data, updating summaries incrementally if possible.
+
+        If ``new_data`` extends the current data with extra rows, and its
+        first rows are identical to the current data, only the extra rows
+        are processed, as in :py:meth:`append`. Existing rows are compared
+        by digest, see :py:class:`DataDigest <prettypandas.cache.DataDigest>`.
+        The digest of the current data is kept between calls, so each call
+        only hashes ``new_data``, whose digest is kept in turn. Otherwise
+        every summary is recomputed.
+
+        :param new_data: DataFrame replacing the current data.
+        :returns: New PrettyPandas using ``new_data``.
+        """
+        n = len(self.data)
+        if (len(new_data) > n and
+                new_data.columns.equals(self.data.columns) and
+                new_data.index[:n].equals(self.data.index)):
+            with stage('update.digest'):
+                prefix = DataDigest(new_data).update(new_data.iloc[:n])
+                digest = prefix.hexdigest()
+                unchanged = digest is not None and \
+                    digest == self._data_digest().hexdigest()
+            if unchanged:
+                return self._extend(new_data, new_data.iloc[n:], prefix)
+
+        return self._copy(data=new_data, stats=None)
+
+    def _data_digest(self):
+        """DataDigest of the data, computed on first use"""
+        if self._digest is None:
+            self._digest = DataDigest(self.data).update(self.data)
+        return self._digest
+
+    def invalidate(self):
+        """Drop cached frames for this table and every copy sharing its cache.
+
+        Call this after modifying the underlying data in place. Running
+        statistics computed from the data are dropped as well, and rebuilt
+        from the data when needed. Statistics of rows that are not in the
+        data, such as those of :py:meth:`from_chunks`, are kept.
+        """
+        self.cache.clear()
+        self._digest = None
+        if isinstance(self.stats, ColumnStats) and \
+                self.stats.rows == len(self.data):
+            self.stats = None
+        return self
 
     @property
     def frame(self):
         """Add summaries and convert back to DataFrame"""
-        return self._apply_summaries()
+        return self._materialize().copy()
 
-    def to_frame(self):
-        """Add summaries and convert back to DataFrame"""
+    def to_frame(self, view=False):
+        """Add summaries and convert back to DataFrame
+
+        :param view:
+            Return a :py:class:`SummaryView <prettypandas.assembly.SummaryView>`
+            of the data, summary rows and summary columns as separate frames
+            instead of combining them. The data is not copied.
+        """
+        if view:
+            rows, cols = self._summary_frames()
+            return SummaryView(self.data, rows, cols)
         return self.frame
 
     @property
     def style(self):
         """Add summaries and convert to Pandas Styler"""
-        row_titles = [a.title for a in self._cleaned_summary_rows]
-        col_titles = [a.title for a in self._cleaned_summary_cols]
-        row_ix = pd.IndexSlice[row_titles, :]
-        col_ix = pd.IndexSlice[:, col_titles]
-
-        def handle_na(df):
-            df.loc[col_ix] = df.loc[col_ix].fillna('')
-            df.loc[row_ix] = df.loc[row_ix].fillna('')
-            return df
+        with self._profiling(), stage('style'):
+            df = self._materialize()
+            row_titles = [a.title for a in self._cleaned_summary_rows]
+            col_titles = [a.title for a in self._cleaned_summary_cols]
+            row_ix = pd.IndexSlice[row_titles, :]
+            col_ix = pd.IndexSlice[:, col_titles]
+
+            with stage('style.applymap'):
+                styler = (
+                    df
+                    .style
+                    .applymap(lambda r: 'font-weight: 900', subset=row_ix)
+                    .applymap(lambda r: 'font-weight: 900', subset=col_ix)
+                )
 
-        styler = (
-            self
-            .frame
-            .pipe(handle_na)
-            .style
-            .applymap(lambda r: 'font-weight: 900', subset=row_ix)
-            .applymap(lambda r: 'font-weight: 900', subset=col_ix)
-        )
+            for i, formatter in enumerate(self._live_formatters(df)):
+                with stage('formatter[{}]:{}'.format(
+                        i, callable_name(formatter.formatter))):
+                    styler = formatter.apply(styler)
+
+            with stage('style.blanks'):
+                for subset in self._blank_subsets(df):
+                    styler = styler.format(lambda v: '', subset=subset)
 
-        for formatter in self.formatters:
-            styler = formatter.apply(styler)
+            profiler = self.profiler or active_profiler()
+            if profiler is not None:
+                instrument_styler(styler, profiler)
 
         return styler
 
-    def render(self):
-        return self.style.render()
+    def _blank_subsets(self, df):
+        """Styler subsets covering the missing values in summary rows and
+        columns, which are displayed as blanks.
+
+        Missing values are found from the summary margins only, so the data
+        keeps its dtypes instead of being filled with strings.
+        """
+        summary_rows, summary_cols = self._summary_masks(df)
+        row_positions = np.flatnonzero(summary_rows)
+        col_positions = np.flatnonzero(summary_cols)
+
+        subsets = []
+        if len(row_positions):
+            missing = df.iloc[row_positions].isna().values
+            for i, blank in zip(row_positions, missing):
+                cols = np.flatnonzero(blank)
+                if len(cols):
+                    subsets.append(pd.IndexSlice[
+                        [df.index[i]], df.columns[cols]])
+
+        if len(col_positions):
+            missing = df.iloc[:, col_positions].isna().values
+            missing[row_positions] = False
+            for j, blank in zip(col_positions, missing.T):
+                rows = np.flatnonzero(blank)
+                if len(rows):
+                    subsets.append(pd.IndexSlice[
+                        df.index[rows], [df.columns[j]]])
+
+        return subsets
+
+    def _live_formatters(self, df):
+        """Formatters of the plan that format at least one visible cell of
+        the summarized frame df"""
+        return live_formatters(df, self.plan.ops('formatters'))
+
+    def _summary_masks(self, df):
+        """Boolean arrays marking the summary rows and columns of df"""
+        rows = np.zeros(df.shape[0], dtype=bool)
+        cols = np.zeros(df.shape[1], dtype=bool)
+        if self.subtotals:
+            _, subtotal_rows = self._with_subtotals()
+            rows[:len(subtotal_rows)] = subtotal_rows
+        if self.summary_rows:
+            rows[-len(self.summary_rows):] = True
+        if self.summary_cols:
+            cols[-len(self.summary_cols):] = True
+        return rows, cols
+
+    def _data_rows(self, df):
+        """Number of rows of df before the summary rows, which includes
+        subtotal rows"""
+        return len(df) - len(self.summary_rows)
+
+    def page_count(self, page_size=PAGE_SIZE):
+        """Number of pages of ``page_size`` data rows, see :py:meth:`render`"""
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1.")
+        n = self._data_rows(self._materialize())
+        return max(1, -(-n // page_size))
+
+    def _visible_rows(self, df, page=None, page_size=PAGE_SIZE,
+                      max_rows=None):
+        """Positions of the rows of df to render, or None for every row,
+        and the position among them of an ellipsis row, or None"""
+        n = self._data_rows(df)
+        summaries = np.arange(n, len(df))
+
+        if page is not None:
+            pages = self.page_count(page_size)
+            if not 0 <= page < pages:
+                raise ValueError("Page {} is out of range for {} pages."
+                                 .format(page, pages))
+            start = page * page_size
+            data = np.arange(start, min(start + page_size, n))
+            return np.concatenate([data, summaries]), None
+
+        if max_rows is not None and n > max_rows:
+            head = (max_rows + 1) // 2
+            data = np.concatenate([np.arange(head),
+                                   np.arange(n - (max_rows - head), n)])
+            return np.concatenate([data, summaries]), head
+
+        return None, None
+
+    def _renderer(self, page=None, page_size=PAGE_SIZE, max_rows=None,
+                  renderer=HTMLRenderer):
+        df = self._materialize()
+        summary_rows, summary_cols = self._summary_masks(df)
+        rows, ellipsis = self._visible_rows(df, page, page_size, max_rows)
+        with stage('render.format'):
+            cells = format_frame(df, self._live_formatters(df), rows)
+        if rows is None:
+            return renderer(df, cells, summary_rows, summary_cols)
+        return renderer(df.iloc[rows], cells, summary_rows[rows],
+                        summary_cols, ellipsis=ellipsis)
+
+    def _render_key(self, *args):
+        """Key of the rendered output in the render cache, or None if the
+        table cannot be cached.
+
+        Tables whose plan uses lambdas or nested functions, whose data
+        cannot be hashed, or whose summaries come from statistics of rows
+        that are not in the data, such as tables made by
+        :py:meth:`from_chunks`, are not cached.
+        """
+        if self.stats is not None and self.stats.rows != len(self.data):
+            return None
+
+        plan = self.plan.token()
+        if plan is None:
+            return None
+
+        with stage('render.digest'):
+            digest = self._data_digest().hexdigest()
+        if digest is None:
+            return None
+
+        # Keys include the version, as output may change between releases
+        from . import __version__
+
+        return '{}:{}:{}'.format(__version__, digest, hashlib.blake2b(
+            (plan + token(args)).encode('utf-8'),
+            digest_size=20).hexdigest())
+
+    def render(self, stream=False, chunk_rows=None, page=None,
+               page_size=PAGE_SIZE, max_rows=None):
+        """Render the table as HTML without building a pandas Styler.
+
+        Summary rows and columns are marked with a ``summary`` CSS class.
+        Use :py:attr:`style` to render through the Pandas Style API instead.
+
+        Large tables can be rendered one page at a time with ``page``, or
+        as their first and last rows with ``max_rows``. Only the visible
+        rows are formatted. Summaries are always computed over the full
+        data and rendered after the visible rows.
+
+        With a ``render_cache``, the HTML of a table whose data and plan
+        have not changed is returned from the cache. Streamed output is not
+        cached.
+
+        :param stream:
+            Return a generator of HTML chunks instead of a single string.
+        :param chunk_rows: Number of table rows per chunk when streaming.
+        :param page:
+            Position of the page of ``page_size`` data rows to render,
+            starting at 0. See :py:meth:`page_count`.
+        :param page_size: Number of data rows on each page.
+        :param max_rows:
+            Maximum number of data rows to render. Longer tables show their
+            first and last rows separated by a row of ``...`` cells.
+        """
+        with self._profiling(), stage('render'):
+            if stream:
+                renderer = self._renderer(page, page_size, max_rows)
+                if chunk_rows is None:
+                    return renderer.iter_chunks()
+                return renderer.iter_chunks(chunk_rows)
+
+            key = None
+            if self.render_cache is not None:
+                key = self._render_key('render', page, page_size, max_rows)
+                html = None if key is None else self.render_cache.get(key)
+                if html is not None:
+                    return html
+
+            renderer = self._renderer(page, page_size, max_rows)
+            with stage('render.html'):
+                html = renderer.render()
+
+            if key is not None:
+                self.render_cache.set(key, html)
+            return html
+
+    def render_rows(self, start=0, stop=None):
+        """Render only the HTML ``<tr>`` elements for some data rows,
+        followed by the summary rows.
+
+        After :py:meth:`append`, pass the previous number of rows as
+        ``start`` to get just the new rows and the updated summaries.
+
+        :param start: Position of the first data row to render. Subtotal
+            rows are counted as data rows.
+        :param stop: Position after the last data row to render.
+        """
+        with self._profiling(), stage('render_rows'):
+            df = self._materialize()
+            summary_rows, summary_cols = self._summary_masks(df)
+
+            n = self._data_rows(df)
+            stop = n if stop is None else min(stop, n)
+            rows = np.concatenate([np.arange(start, stop),
+                                   np.arange(n, len(df))])
+
+            with stage('render.format'):
+                cells = format_frame(df, self._live_formatters(df), rows)
+            renderer = HTMLRenderer(df.iloc[rows], cells,
+                                    summary_rows[rows], summary_cols)
+            with stage('render.html'):
+                return renderer.render_body()
+
+    def to_excel(self, path, sheet_name='Sheet1', index=True):
+        """Write the table to an XLSX file with xlsxwriter.
+
+        Cells keep their numeric values. ``as_percent``, ``as_unit`` and
+        ``as_currency`` become native Excel number formats, and summary rows
+        and columns are written in bold. The workbook is written in
+        xlsxwriter's ``constant_memory`` mode, see
+        :py:func:`write_excel <prettypandas.excel.write_excel>`.
+
+        :param path: Path or file-like object of the workbook.
+        :param sheet_name: Name of the worksheet.
+        :param index: Write the index as the first columns.
+        """
+        from .excel import write_excel
+
+        with self._profiling(), stage('to_excel'):
+            df = self._materialize()
+            summary_rows, summary_cols = self._summary_masks(df)
+            write_excel(df, path, self._live_formatters(df), summary_rows,
+                        summary_cols, sheet_name=sheet_name, index=index)
+
+    def _render_text(self, method, page, page_size, max_rows):
+        with self._profiling(), stage('render.' + method):
+            renderer = self._renderer(page, page_size, max_rows,
+                                      renderer=TextRenderer)
+            return getattr(renderer, 'render_' + method)()
+
+    def to_text(self, page=None, page_size=PAGE_SIZE, max_rows=None):
+        """Render the table as plain text aligned in columns, for logs and
+        terminals.
+
+        Cells are formatted the same way as :py:meth:`render`, and rows can
+        be limited the same way with ``page`` or ``max_rows``.
+
+        :param page: Position of the page of ``page_size`` data rows.
+        :param page_size: Number of data rows on each page.
+        :param max_rows: Maximum number of data rows to show. Longer tables
+            show their first and last rows separated by a row of ``...``.
+        """
+        return self._render_text('text', page, page_size, max_rows)
+
+    def to_markdown(self, page=None, page_size=PAGE_SIZE, max_rows=None):
+        """Render the table as a Markdown table, with summaries in bold.
+
+        Takes the same arguments as :py:meth:`to_text`.
+        """
+        return self._render_text('markdown', page, page_size, max_rows)
+
+    def to_latex(self, page=None, page_size=PAGE_SIZE, max_rows=None):
+        """Render the table as a LaTeX ``tabular`` using the booktabs
+        package, with summaries in bold.
+
+        Takes the same arguments as :py:meth:`to_text`.
+        """
+        return self._render_text('latex', page, page_size, max_rows)
 
     def _repr_html_(self):
-        return self.style._repr_html_()
+        """Render at most ``display.max_rows`` data rows, like pandas"""
+        return self.render(max_rows=pd.get_option('display.max_rows'))
 
     def __str__(self):
-        return str(self.frame)
+        return self.to_text(max_rows=pd.get_option('display.max_rows'))
 
     def __repr__(self):
-        return str(self.frame)
+        return str(self)
 
     def summary(self,
                 func=methodcaller('sum'),
@@ -302,35 +1148,72 @@ class PrettyPandas(object):
 
         :param title: Title to be displayed.
         """
-        return self.summary(methodcaller('sum'), title, **kwargs)
+        return self.summary('sum', title, **kwargs)
 
     def average(self, title="Average", **kwargs):
         """Add a mean summary to this table.
 
         :param title: Title to be displayed.
         """
-        return self.summary(methodcaller('mean'), title, **kwargs)
+        return self.summary('mean', title, **kwargs)
 
     def median(self, title="Median", **kwargs):
         """Add a median summary to this table.
 
         :param title: Title to be displayed.
         """
-        return self.summary(methodcaller('median'), title, **kwargs)
+        return self.summary('median', title, **kwargs)
 
     def max(self, title="Maximum", **kwargs):
         """Add a maximum summary to this table.
 
         :param title: Title to be displayed.
         """
-        return self.summary(methodcaller('max'), title, **kwargs)
+        return self.summary('max', title, **kwargs)
 
     def min(self, title="Minimum", **kwargs):
         """Add a minimum summary to this table.
 
         :param title: Title to be displayed.
         """
-        return self.summary(methodcaller('min'), title, **kwargs)
+        return self.summary('min', title, **kwargs)
+
+    def subtotal(self,
+                 level=0,
+                 func='sum',
+                 title='Subtotal',
+                 subset=None,
+                 *args,
+                 **kwargs):
+        """Add a subtotal row after every group of a MultiIndex level.
+
+        Each group is made of the rows sharing the same labels on ``level``
+        and every level above it. Its subtotal row follows the last row of
+        the group and is labelled with the group labels followed by
+        ``title``. Subtotals of deeper levels come before those of the
+        levels above them.
+
+        Parameters
+        ----------
+        :param level:
+            Index level, by position or name, or a list of levels. The last
+            level of the index cannot be subtotalled.
+        :param func: Function to be used for the subtotal.
+        :param title: Title for this subtotal row.
+        :param subset: Subset of columns to compute subtotals on.
+        :param args: Positional arguments passed to the function.
+        :param kwargs: Keyword arguments passed to the function.
+
+        Summary rows are computed over the data only; summary columns are
+        also computed for subtotal rows.
+        """
+        levels = level if isinstance(level, list) else [level]
+
+        plan = self.plan
+        for level in levels:
+            plan = plan.add('subtotals', Subtotal(title, func, level, subset,
+                                                  *args, **kwargs))
+        return self._copy(plan=plan)
 
     def as_percent(self, precision=2, *args, **kwargs):
         """Format subset as percentages
@@ -341,11 +1224,12 @@ class PrettyPandas(object):
         f = Formatter(as_percent(precision), args, kwargs)
         return self._add_formatter(f)
 
-    def as_currency(self, currency='USD', locale=LOCALE_OBJ, *args, **kwargs):
+    def as_currency(self, currency='USD', locale=None, *args, **kwargs):
         """Format subset as currency
 
         :param currency: Currency
-        :param locale: Babel locale for currency formatting
+        :param locale: Babel locale for currency formatting, defaults to
+            the process locale
         :param subset: Pandas subset
         """
         f = Formatter(
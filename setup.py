@@ -1,16 +1,21 @@
 from setuptools import setup
 from codecs import open
 from os import path
+import re
 
 here = path.abspath(path.dirname(__file__))
 
 with open(path.join(here, 'README.txt'), encoding='utf-8') as f:
     long_description = f.read()
 
+with open(path.join(here, 'prettypandas', '__init__.py'),
+          encoding='utf-8') as f:
+    version = re.search(r"__version__ = '([^']+)'", f.read()).group(1)
+
 setup(
     name='prettypandas',
 
-    version='0.0.4',
+    version=version,
 
     description='Pandas Styler for Report Quality Tables.',
     long_description=long_description,
@@ -30,22 +35,31 @@ setup(
 
         'License :: OSI Approved :: MIT License',
 
-        'Programming Language :: Python :: 2',
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.2',
-        'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
     ],
 
     keywords='pandas pretty display tables reporting',
 
     packages=["prettypandas"],
 
+    python_requires=">=3.7",
+
     install_requires=[
         "babel",
         "numpy",
-        "pandas >= 0.17.1"
+        "pandas >= 1.2"
     ],
+
+    extras_require={
+        'arrow': ["pyarrow"],
+        'parquet': ["pyarrow"],
+        'dask': ["dask[dataframe]"],
+        'polars': ["polars >= 1.0", "pyarrow"],
+        'excel': ["xlsxwriter"],
+    },
 )
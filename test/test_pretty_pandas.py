@@ -1,4 +1,6 @@
 import copy
+import subprocess
+import sys
 
 import pytest
 import numpy as np
@@ -94,5 +96,947 @@ def test_mulitindex():
                        'D': [4, 3],
                        'C': [6, 7]})
 
+    output = (PrettyPandas(df.set_index(['A', 'B']))
+              .total()
+              .total(axis=1)
+              ._apply_summaries())
+
+    assert list(output['Total'][:2]) == [10, 10]
+    assert list(output.loc[('Total', ''), ['D', 'C']]) == [7, 13]
+
+
+def test_batched_summaries_match_pandas(dataframe):
+    dataframe.iloc[2, 1] = np.nan
+    p = (PrettyPandas(dataframe)
+         .total()
+         .average()
+         .median()
+         .min()
+         .max()
+         .summary(lambda c: (c > 0).sum(), title='> 0'))
+
+    r = p._apply_summaries()
+    assert list(r.index[-6:]) == ['Total', 'Average', 'Median', 'Minimum',
+                                  'Maximum', '> 0']
+    assert np.allclose(r.loc['Total'], dataframe.sum())
+    assert np.allclose(r.loc['Average'], dataframe.mean())
+    assert np.allclose(r.loc['Median'], dataframe.median())
+    assert np.allclose(r.loc['Minimum'], dataframe.min())
+    assert np.allclose(r.loc['Maximum'], dataframe.max())
+    assert np.allclose(r.loc['> 0'], (dataframe > 0).sum())
+
+
+def test_batched_column_summaries(dataframe):
+    p = PrettyPandas(dataframe).total(axis=1).max(axis=1)
+    r = p._apply_summaries()
+
+    assert np.allclose(r['Total'], dataframe.sum(axis=1))
+    assert np.allclose(r['Maximum'], dataframe.max(axis=1))
+
+
+def test_reduce_frame_integer_dtypes():
+    from prettypandas.aggregation import reduce_frame
+
+    df = pd.DataFrame({'A': [1, 2, 3], 'B': [4, 5, 6]})
+    result = reduce_frame(df, ['sum', 'min', 'mean'])
+
+    assert result['sum'].dtype == df.sum().dtype
+    assert result['min'].dtype == df.min().dtype
+    assert (result['mean'] == df.mean()).all()
+
+
+def test_reduce_frame_mixed_dtypes():
+    from prettypandas.aggregation import reduce_frame
+
+    df = pd.DataFrame({'a': [2 ** 60 + 1, 3], 'f': [1.0, 2.0],
+                       'b': [True, False]})
+    result = reduce_frame(df, ['sum', 'max'])
+    assert list(result['sum'].index) == ['a', 'f', 'b']
+    assert result['sum']['a'] == 2 ** 60 + 4
+    assert result['max']['a'] == 2 ** 60 + 1
+    assert result['sum']['b'] == 1 and result['max']['b']
+
+    r = PrettyPandas(df).total().max()._apply_summaries()
+    assert r.loc['Total', 'a'] == 2 ** 60 + 4
+    assert r.loc['Maximum', 'a'] == 2 ** 60 + 1
+
+    r = PrettyPandas(df).total(axis=1)._apply_summaries()
+    assert r['Total'].dtype == 'float64'
+    assert list(r['Total']) == list(df.sum(axis=1).astype(float))
+
+
+def test_frame_cache(dataframe):
+    p = PrettyPandas(dataframe).total()
+    first = p._materialize()
+    assert p._materialize() is first
+    assert p.cache.hits == 1
+
+    chained = p.as_percent()
+    assert chained.cache is p.cache
+    assert chained._materialize() is first
+
+    dataframe.iloc[0, 0] = 100
+    p.invalidate()
+    assert p.frame.loc['Total', 'A'] == dataframe['A'].sum()
+
+    p.frame.loc['Total', 'A'] = -1
+    assert p._materialize().loc['Total', 'A'] == dataframe['A'].sum()
+
+
+def test_lru_cache_bounds():
+    from prettypandas.cache import LRUCache
+
+    cache = LRUCache(maxsize=2, max_bytes=10, sizeof=len)
+    cache.set('a', 'xxxx')
+    cache.set('b', 'xxxx')
+    cache.set('c', 'xxxx')
+    assert 'a' not in cache
+    assert len(cache) == 2
+
+    cache.set('d', 'xxxxxxxx')
+    assert cache.nbytes <= 10
+    assert cache.get('d') == 'xxxxxxxx'
+
+    cache.set('e', 'x' * 11)
+    assert 'e' not in cache
+
+
+def test_number_formatter_bulk_matches_scalar():
+    from prettypandas import as_percent, as_unit
+
+    values = np.array([0.125, -3, np.nan, 1e6, 0], dtype=object)
+    values = np.append(values, ['text', None])
+
+    for formatter in [as_percent(1), as_unit('m'), as_unit('$', 0, 'prefix')]:
+        bulk = formatter.format_array(values)
+        assert list(bulk) == [formatter(v) for v in values]
+
+    assert as_percent(2)(0.5) == '50.00%'
+    assert as_unit('m', location='prefix')(3) == 'm3.00'
+    assert as_percent()(np.nan) == ''
+
+
+def test_formatter_subset(dataframe):
+    html = (PrettyPandas(dataframe)
+            .as_percent(subset='A')
+            .as_unit('m', subset=['B'])
+            .style
+            .to_html())
+
+    assert '{:.2f}%'.format(dataframe['A'][0] * 100) in html
+    assert '{:.2f}m'.format(dataframe['B'][0]) in html
+
+
+def test_currency_formatter_matches_babel():
+    from babel import numbers
+    from prettypandas import as_currency
+
+    values = np.array([1234567.891, -0.5, 0, 42, -98765.4321])
+    for currency, locale in [('USD', 'en_US'), ('EUR', 'de_DE'),
+                             ('INR', 'en_IN'), ('JPY', 'ja_JP')]:
+        formatter = as_currency(currency, locale)
+        expected = [numbers.format_currency(v, currency, locale=locale)
+                    for v in values]
+        assert list(formatter.format_array(values)) == expected
+        assert formatter(values[0]) == expected[0]
+
+
+def test_currency_formatter_rounds_like_babel():
+    from babel import numbers
+    from prettypandas import as_currency
+
+    np.random.seed(0)
+    values = np.concatenate([
+        np.round(np.random.uniform(-100, 100, 2000), 3),
+        np.round(np.random.uniform(-10, 10, 500), 1),
+        [2.675, 0.125, -1.005, 1e15 + 0.5, np.inf, -np.inf],
+    ])
+    for currency, locale in [('USD', 'en_US'), ('EUR', 'de_DE'),
+                             ('INR', 'en_IN'), ('JPY', 'ja_JP')]:
+        formatter = as_currency(currency, locale)
+        expected = [numbers.format_currency(v, currency, locale=locale)
+                    for v in values]
+        assert list(formatter.format_array(values)) == expected
+        assert formatter(2.675) == expected[-6]
+
+
+def test_currency_formatter_ties_are_rare():
+    from decimal import Decimal
+    from prettypandas import as_currency
+
+    np.random.seed(0)
+    formatter = as_currency('USD', 'en_US')
+    for scale in (1e2, 1e5, 1e9):
+        values = np.random.uniform(-scale, scale, 1000)
+        magnitudes = formatter._magnitudes(values)
+        assert sum(isinstance(v, Decimal) for v in magnitudes) < 10
+
+
+def test_currency_formatter_cached():
+    from prettypandas import as_currency
+
+    assert as_currency('GBP', 'en_GB') is as_currency('GBP', 'en_GB')
+    assert as_currency('GBP', 'en_GB') is not as_currency('GBP', 'fr_FR')
+
+
+def test_compiled_formatter_cache():
+    from prettypandas import formatters
+
+    formatters.clear_formatter_cache()
+    assert formatters.as_percent(3) is formatters.as_percent(3)
+    assert formatters.as_unit('m', 1) is \
+        formatters.compiled_formatter('unit', 1, 'm', 'suffix')
+    assert formatters.as_unit('m', 1) is not formatters.as_unit('m', 2)
+
+    info = formatters.formatter_cache_info()
+    assert (info['hits'], info['misses'], info['entries']) == (3, 3, 3)
+    assert info['maxsize'] == formatters.FORMATTER_CACHE_SIZE
+
+    p = PrettyPandas(pd.DataFrame({'A': [1.0]}))
+    assert p.as_percent().plan == p.as_percent().plan
+
+    with pytest.raises(ValueError):
+        formatters.compiled_formatter('fraction')
+    with pytest.raises(TypeError):
+        formatters.as_percent(1.5)
+
+
+def test_render_cache(dataframe, tmpdir):
+    from prettypandas.cache import DiskCache, html_cache
+
+    cache = html_cache()
+    p = PrettyPandas(dataframe, render_cache=cache).total().as_percent()
+    html = p.render()
+    assert p.render() == html
+    assert p._repr_html_() == p._repr_html_() == html
+    assert cache.stats['hits'] == 2
+
+    copy = PrettyPandas(dataframe.copy(), render_cache=cache).total()
+    assert copy.as_percent().render() == html
+    assert cache.stats['hits'] == 3
+
+    changed = dataframe.copy()
+    changed.iloc[-1, -1] += 1
+    assert PrettyPandas(changed, render_cache=cache).total().as_percent() \
+        .render() != html
+
+    p.summary(lambda s: s.sum(), 'Custom').render()
+    assert cache.stats['entries'] == 3
+
+    disk = DiskCache(str(tmpdir), max_bytes=len(html) + 1)
+    PrettyPandas(dataframe, render_cache=disk).total().render()
+    assert PrettyPandas(dataframe, render_cache=DiskCache(str(tmpdir))) \
+        .total().render() == PrettyPandas(dataframe).total().render()
+    PrettyPandas(dataframe, render_cache=disk).average().render()
+    assert len(disk) == 1
+
+
+def test_render_cache_sees_redefined_functions(dataframe):
+    from prettypandas import __version__
+    from prettypandas.cache import html_cache
+
+    cache = html_cache()
+    namespace = {'__name__': 'reports'}
+    rendered = []
+    for body in ('s.sum()', 's.max()'):
+        exec('def agg(s):\n    return {}\n'.format(body), namespace)
+        p = PrettyPandas(dataframe, render_cache=cache) \
+            .summary(namespace['agg'], 'Agg')
+        rendered.append(p.render())
+        assert p._render_key().startswith(__version__ + ':')
+
+    assert rendered[0] != rendered[1]
+    assert cache.stats['entries'] == 2
+
+
+def test_render_pages():
+    df = pd.DataFrame({'A': np.arange(10), 'B': np.arange(10) * 2.0})
+    p = PrettyPandas(df).total().average(axis=1)
+
+    assert p.page_count(page_size=4) == 3
+    html = p.render(page=2, page_size=4)
+    assert html.count('<tr') == 1 + 2 + 1
+    assert '<th>8</th>' in html and '<th>7</th>' not in html
+    assert '<tr class="summary"><th>Total</th><td>45</td>' in html
+
+    with pytest.raises(ValueError):
+        p.render(page=3, page_size=4)
+
+    html = p.render(max_rows=3)
+    assert html.count('<tr class="ellipsis">') == 1
+    assert html.count('<tr') == 1 + 3 + 1 + 1
+    assert html.index('<th>1</th>') < html.index('ellipsis') < \
+        html.index('<th>9</th>')
+    assert '<th>2</th>' not in html
+    assert p.render(max_rows=10) == p.render()
+
+
+def test_text_renderers():
+    df = pd.DataFrame({'A': [0.5, 0.25, 1.0], 'B|C': [10, 200, 3]})
+    p = PrettyPandas(df).total().as_percent(subset=['A'], precision=0)
+
+    assert p.to_text().split('\n') == [
+        '          A  B|C',
+        '0       50%   10',
+        '1       25%  200',
+        '2      100%    3',
+        'Total  175%  213',
+    ]
+    assert str(p) == p.to_text()
+    assert p.to_text(max_rows=2).split('\n')[2] == '...     ...  ...'
+
+    markdown = p.to_markdown().split('\n')
+    assert markdown[0] == '|           |        A |    B\\|C |'
+    assert markdown[1] == '| :-------- | -------: | ------: |'
+    assert markdown[-1] == '| **Total** | **175%** | **213** |'
+
+    latex = p.to_latex(page=1, page_size=2).split('\n')
+    assert latex[:4] == ['\\begin{tabular}{lrr}', '\\toprule',
+                         ' & A & B|C \\\\', '\\midrule']
+    assert latex[4:6] == ['2 & 100\\% & 3 \\\\',
+                          '\\textbf{Total} & \\textbf{175\\%} & '
+                          '\\textbf{213} \\\\']
+
+
+def test_to_excel(tmpdir):
+    pytest.importorskip('xlsxwriter')
+    openpyxl = pytest.importorskip('openpyxl')
+    df = pd.DataFrame({'A': [0.25, 0.5, np.nan], 'B': [10, -20, 30],
+                       'C': ['x', 'y', 'z']})
+    path = str(tmpdir.join('table.xlsx'))
+    (PrettyPandas(df)
+     .total()
+     .average(axis=1)
+     .as_percent(subset=['A'])
+     .as_currency(subset=pd.IndexSlice[[0, 1], ['B']], locale='en_US')
+     .as_unit('kg', subset=['Average'])
+     .summary(lambda s: '-', title='Note', subset=['C'])
+     .to_excel(path))
+
+    sheet = openpyxl.load_workbook(path).active
+    rows = [[cell for cell in row] for row in sheet.iter_rows()]
+    assert [c.value for c in rows[0]] == [None, 'A', 'B', 'C', 'Average']
+    assert [c.value for c in rows[1]] == [0, 0.25, 10, 'x', 5.125]
+    assert rows[1][1].number_format == '0.00%'
+    assert rows[2][2].number_format == '"$"#,##0.00;"-$"#,##0.00'
+    assert rows[3][2].number_format == 'General'
+    assert rows[3][1].value is None
+    assert rows[1][4].number_format == '0.00"kg"' and rows[1][4].font.b
+    assert not rows[1][1].font.b
+
+    assert [c.value for c in rows[4][:3]] == ['Total', 0.75, 20]
+    assert all(c.font.b for c in rows[4])
+    assert rows[4][1].number_format == '0.00%'
+    assert rows[5][3].value == '-'
+
+
+def test_nullable_dtypes_are_preserved():
+    df = pd.DataFrame({'i': pd.array([1, None, 3], dtype='Int64'),
+                       'f': pd.array([1.5, None, 2.5], dtype='Float64')})
+    p = PrettyPandas(df).total().average()
+    r = p._apply_summaries()
+
+    assert r['i'].dtype == 'Int64'
+    assert r['f'].dtype == 'Float64'
+    assert r.loc['Total', 'i'] == 4
+
+    html = p.as_percent(subset=['f']).render()
+    assert '<tr><th>1</th><td></td><td></td></tr>' in html
+    assert '<tr class="summary"><th>Total</th><td>4</td><td>400.00%</td>' \
+        in html
+
+
+def test_arrow_dtypes_are_preserved():
+    pa = pytest.importorskip('pyarrow')
+    if not hasattr(pd, 'ArrowDtype'):
+        pytest.skip('pandas without ArrowDtype')
+
+    df = pd.DataFrame({
+        'a': pd.array([1, None, 3], dtype=pd.ArrowDtype(pa.int64())),
+        's': pd.array(['x', None, 'z'], dtype=pd.ArrowDtype(pa.string())),
+    })
+    p = PrettyPandas(df).total().average()
+    r = p._apply_summaries()
+
+    assert r['a'].dtype == pd.ArrowDtype(pa.int64())
+    assert r['s'].dtype == df['s'].dtype
+    assert r.loc['Average', 'a'] == 2
+    assert '<td>200.00%</td>' in p.as_percent(subset=['a']).render()
+
+
+def test_summary_columns_keep_nullable_dtypes():
+    pa = pytest.importorskip('pyarrow')
+    if not hasattr(pd, 'ArrowDtype'):
+        pytest.skip('pandas without ArrowDtype')
+
+    nullable = pd.DataFrame({'a': pd.array([1, None, 3], dtype='Int64'),
+                             'b': pd.array([4, 5, 6], dtype='Int64')})
+    arrow = pd.DataFrame({
+        'a': pd.array([1.5, None, 3], dtype=pd.ArrowDtype(pa.float64())),
+        'b': pd.array([4, 5, 6], dtype=pd.ArrowDtype(pa.int64())),
+    })
+    for axis in (1, None):
+        r = PrettyPandas(nullable).total(axis=axis).average(axis=axis) \
+            ._apply_summaries()
+        assert r['Total'].dtype == 'Int64'
+        assert r['Average'].dtype == 'Float64'
+        assert r.loc[1, 'Total'] == 5
+
+        r = PrettyPandas(arrow).total(axis=axis).average(axis=axis) \
+            ._apply_summaries()
+        assert r['Total'].dtype == pd.ArrowDtype(pa.float64())
+        assert r['Average'].dtype == pd.ArrowDtype(pa.float64())
+        assert r.loc[0, 'Total'] == 5.5
+
+
+def test_boolean_columns_with_summaries():
+    df = pd.DataFrame({'a': [1, 2], 'flag': [True, False]})
+    p = PrettyPandas(df).total()
+    r = p._apply_summaries()
+    assert list(r['flag']) == [True, False, 1]
+    assert r.loc[0, 'flag'] is True
+    assert r['a'].dtype == 'int64'
+    assert 'True' in p.to_text() and '1.000000' not in p.to_text()
+
+    df = pd.DataFrame({'b': pd.array([True, None, True], dtype='boolean'),
+                       'x': pd.array([1.5, 2, 3], dtype='Float64')})
+    r = PrettyPandas(df).total(axis=None)._apply_summaries()
+    assert r.loc[0, 'b'] is True
+    assert r.loc['Total', 'b'] == 2
+    assert r['x'].dtype == 'Float64'
+
+
+def test_import_does_not_load_babel():
+    code = "import sys, prettypandas; sys.exit('babel' in sys.modules)"
+    assert subprocess.call([sys.executable, '-c', code]) == 0
+
+    code = ("import sys, prettypandas; prettypandas.as_currency(); "
+            "sys.exit('babel' not in sys.modules)")
+    assert subprocess.call([sys.executable, '-c', code]) == 0
+
+
+def test_from_parquet(dataframe, tmpdir):
+    pytest.importorskip('pyarrow')
+    path = str(tmpdir.join('data.parquet'))
+    dataframe.iloc[3, 1] = np.nan
+    dataframe.to_parquet(path, row_group_size=4)
+
+    p = PrettyPandas.from_parquet(path, columns=['A', 'B'], head=2,
+                                  summaries=['min', 'max', 'count'])
+    assert p.stats.exact_reductions == {'min', 'max', 'count'}
+    r = p.min().max().summary('count', title='N')._apply_summaries()
+    assert list(r.columns) == ['A', 'B'] and len(r) == 5
+    assert np.allclose(r.loc['Minimum'], dataframe[['A', 'B']].min())
+    assert np.allclose(r.loc['Maximum'], dataframe[['A', 'B']].max())
+    assert list(r.loc['N']) == [10, 9]
+    with pytest.raises(ValueError):
+        p.total()._apply_summaries()
+
+    r = (PrettyPandas.from_parquet(path, head=2)
+         .total().average()._apply_summaries())
+    assert np.allclose(r.loc['Total'], dataframe.sum())
+    assert np.allclose(r.loc['Average'], dataframe.mean())
+
+
+def test_from_parquet_counts_skip_nan(tmpdir):
+    pa = pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+
+    path = str(tmpdir.join('nan.parquet'))
+    table = pa.table({'f': pa.array([1, np.nan, 3, None], pa.float64()),
+                      'i': pa.array([1, 2, None, 4], pa.int64())})
+    pq.write_table(table, path, row_group_size=2)
+
+    for summaries in (['count'], None):
+        r = (PrettyPandas.from_parquet(path, head=1, summaries=summaries)
+             .summary('count', 'N')._apply_summaries())
+        assert list(r.loc['N']) == [2, 3]
+
+
+def test_from_dask(dataframe):
+    dd = pytest.importorskip('dask.dataframe')
+    frame = dd.from_pandas(dataframe, npartitions=3)
+
+    p = (PrettyPandas.from_dask(frame, head=4, scheduler='threads')
+         .total()
+         .average()
+         .min()
+         .max()
+         .median())
+    assert len(p.data) == 4
+    r = p._apply_summaries()
+    assert np.allclose(r.loc['Total'], dataframe.sum())
+    assert np.allclose(r.loc['Average'], dataframe.mean())
+    assert np.allclose(r.loc['Minimum'], dataframe.min())
+    assert np.allclose(r.loc['Maximum'], dataframe.max())
+    # Dask medians are approximate
+    assert (r.loc['Median'].between(dataframe.min(), dataframe.max())).all()
+
+    p = PrettyPandas(frame).total()
+    assert len(p.data) == 10 and p.stats.rows == len(dataframe)
+    with pytest.raises(ValueError, match='needs the full data'):
+        (PrettyPandas.from_dask(frame, head=4)
+         .summary(lambda s: s.sum() * 2)._apply_summaries())
+
+
+def test_from_polars(dataframe):
+    pl = pytest.importorskip('polars')
+    dataframe.iloc[3, 1] = np.nan
+    frame = pl.from_pandas(dataframe, nan_to_null=False)
+
+    p = (PrettyPandas.from_polars(frame.lazy(), head=4)
+         .total()
+         .average()
+         .min()
+         .max()
+         .median()
+         .summary('std', title='Std'))
+    assert len(p.data) == 4 and p.stats.rows == len(dataframe)
+    r = p._apply_summaries()
+    for title, func in [('Total', 'sum'), ('Average', 'mean'),
+                        ('Minimum', 'min'), ('Maximum', 'max'),
+                        ('Median', 'median'), ('Std', 'std')]:
+        assert np.allclose(r.loc[title], getattr(dataframe, func)())
+
+    assert len(PrettyPandas(frame).data) == 10
+    with pytest.raises(ValueError):
+        (PrettyPandas.from_polars(frame, head=4)
+         .summary('prod')._apply_summaries())
+
+
+def test_from_chunks(dataframe):
+    chunks = (dataframe.iloc[i:i + 3] for i in range(0, len(dataframe), 3))
+    p = (PrettyPandas.from_chunks(chunks, head=4)
+         .total()
+         .average()
+         .min()
+         .max()
+         .median())
+
+    assert len(p.data) == 4
+    r = p._apply_summaries()
+    assert len(r) == 9
+    assert np.allclose(r.loc['Total'], dataframe.sum())
+    assert np.allclose(r.loc['Average'], dataframe.mean())
+    assert np.allclose(r.loc['Minimum'], dataframe.min())
+    assert np.allclose(r.loc['Maximum'], dataframe.max())
+    assert np.allclose(r.loc['Median'], dataframe.median())
+
+    with pytest.raises(ValueError):
+        (PrettyPandas.from_chunks([dataframe], head=5)
+         .summary(len)
+         ._apply_summaries())
+
+
+def test_statistics_count_every_column():
+    df = pd.DataFrame({'x': [1.5, np.nan, 3, 4], 's': ['a', None, 'c', 'd'],
+                       't': pd.date_range('2020-01-01', periods=4)})
+    expected = [3, 3, 4]
+
+    chunked = PrettyPandas.from_chunks([df.iloc[:2], df.iloc[2:]], head=1)
+    appended = PrettyPandas(df.iloc[:2]).summary('count', 'N') \
+        .append(df.iloc[2:])
+    for p in (chunked.summary('count', 'N'), appended):
+        assert list(p._apply_summaries().loc['N']) == expected
+
+    # Without displayed rows the dtypes of the first chunk are kept
+    empty = PrettyPandas.from_chunks([df.iloc[:2], df.iloc[2:]], head=0)
+    assert list(empty.data.dtypes) == list(df.dtypes)
+    r = empty.total().summary('count', 'N')._apply_summaries()
+    assert r.loc['Total', 'x'] == 8.5
+    assert list(r.loc['N']) == expected
+
+
+def test_lazy_statistics_count_every_column(tmpdir):
+    pytest.importorskip('pyarrow')
+    dd = pytest.importorskip('dask.dataframe')
+    pl = pytest.importorskip('polars')
+    df = pd.DataFrame({'x': [1.5, np.nan, 3, 4], 's': ['a', None, 'c', 'd']})
+
+    path = str(tmpdir.join('data.parquet'))
+    df.to_parquet(path, row_group_size=2)
+    tables = [
+        PrettyPandas.from_parquet(path, head=1, summaries=['count']),
+        PrettyPandas.from_parquet(path, head=1),
+        PrettyPandas.from_dask(dd.from_pandas(df, npartitions=2), head=1),
+        PrettyPandas.from_polars(pl.from_pandas(df), head=1),
+    ]
+    for p in tables:
+        r = p.summary('count', 'N')._apply_summaries()
+        assert list(r.loc['N']) == [3, 3]
+
+
+def test_quantile_sketch_merge():
+    from prettypandas.streaming import QuantileSketch
+
+    np.random.seed(0)
+    values = np.random.randn(20000)
+    left = QuantileSketch(size=200).update(values[:10000])
+    right = QuantileSketch(size=200).update(values[10000:])
+    merged = left.merge(right)
+
+    assert len(merged.means) <= 200
+    assert abs(merged.quantile(0.5) - np.median(values)) < 0.05
+
+
+def _count_positive(column):
+    return (column > 0).sum()
+
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_parallel_summaries(dataframe, executor):
+    def build(**kwargs):
+        return (PrettyPandas(dataframe, **kwargs)
+                .total()
+                .summary(_count_positive, title='> 0')
+                .median()
+                .average(axis=1)
+                .summary(_count_positive, title='> 0', axis=1))
+
+    expected = build()._apply_summaries()
+    actual = build(executor=executor)._apply_summaries()
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_parallel_summaries_match_serial_exactly():
+    from concurrent.futures import ThreadPoolExecutor
+
+    np.random.seed(1)
+    df = pd.DataFrame(np.random.randn(20000, 12) * 1e3)
+    df.iloc[::7, 3] = np.nan
+
+    def build(**kwargs):
+        return (PrettyPandas(df, **kwargs).total().average()
+                .total(axis=1).average(axis=1)._apply_summaries())
+
+    expected = build()
+    for workers in (2, 5, 8):
+        with ThreadPoolExecutor(workers) as pool:
+            assert build(executor=pool).equals(expected)
+
+
+def test_invalid_executor(dataframe):
     with pytest.raises(ValueError):
-        output = PrettyPandas(df.set_index(['A', 'B'])).total(axis=1)._apply_summaries()
+        PrettyPandas(dataframe, executor='gpu')
+
+
+def test_render(dataframe):
+    p = (PrettyPandas(dataframe)
+         .total()
+         .average(axis=1)
+         .as_percent(subset=['A']))
+    html = p.render()
+
+    assert 'style=' not in html
+    assert '<tr class="summary"><th>Total</th>' in html
+    assert '<th class="summary">Average</th>' in html
+    assert '{:.2f}%'.format(dataframe['A'].sum() * 100) in html
+    assert p._repr_html_() == html
+
+    chunks = list(p.render(stream=True, chunk_rows=3))
+    assert len(chunks) > 3
+    assert ''.join(chunks) == html
+
+
+def test_render_escapes_text():
+    df = pd.DataFrame({'<A>': ['a & b', None]})
+    html = PrettyPandas(df).render()
+
+    assert '<th>&lt;A&gt;</th>' in html
+    assert '<td>a &amp; b</td>' in html
+    assert '<td></td>' in html
+
+
+def test_append(dataframe):
+    base = PrettyPandas(dataframe.iloc[:6]).total().average().median()
+    base = base.total(axis=1)
+    base._materialize()
+
+    appended = base.append(dataframe.iloc[6:])
+    assert len(base.data) == 6
+    assert appended.cache.get(appended._cache_key()) is not None
+
+    expected = (PrettyPandas(dataframe)
+                .total()
+                .average()
+                .median()
+                .total(axis=1)
+                ._apply_summaries())
+    assert np.allclose(appended.frame.values.astype(float),
+                       expected.values.astype(float),
+                       equal_nan=True)
+
+    html = appended.render_rows(start=6)
+    assert html.count('<tr') == 4 + 3
+
+
+def test_update(dataframe):
+    base = PrettyPandas(dataframe.iloc[:5]).total()
+    updated = base.update(dataframe)
+    assert updated.stats.rows == len(dataframe)
+    assert np.allclose(updated.frame.loc['Total'], dataframe.sum())
+
+    replaced = base.update(dataframe.iloc[::-1])
+    assert replaced.stats is None
+    assert np.allclose(replaced.frame.loc['Total'], dataframe.sum())
+
+    edited = dataframe.copy()
+    edited.iloc[0, 1] = 100
+    same_length = PrettyPandas(dataframe).total()
+    same_length.render()
+    assert same_length.update(edited).frame.loc['Total', 'B'] == \
+        edited['B'].sum()
+    extended = base.update(pd.concat([edited.iloc[:5], dataframe.iloc[5:]]))
+    assert extended.frame.loc['Total', 'B'] == edited['B'].sum()
+
+
+def test_append_keeps_integer_sums_exact():
+    df = pd.DataFrame({'i': np.array([2 ** 53, 1, 0], dtype='int64'),
+                       's': list('abc')})
+    p = (PrettyPandas(df.iloc[:1]).total().max().summary('count', 'N')
+         .append(df.iloc[1:]))
+    r = p._apply_summaries()
+
+    assert r['i'].dtype == 'int64'
+    assert r.loc['Total', 'i'] == 2 ** 53 + 1
+    assert r.loc['Maximum', 's'] == 'c'
+    assert list(r.loc['N']) == [3, 3]
+
+
+def test_update_only_hashes_new_data(dataframe, monkeypatch):
+    from prettypandas.cache import DataDigest, data_digest
+
+    first = PrettyPandas(dataframe.iloc[:4]).total() \
+        .update(dataframe.iloc[:7])
+    first.render()
+
+    hashed = []
+    update = DataDigest.update
+
+    def counting(digest, rows, *args):
+        hashed.append(len(rows))
+        return update(digest, rows, *args)
+
+    monkeypatch.setattr(DataDigest, 'update', counting)
+    second = first.update(dataframe)
+    second.render()
+    assert hashed == [7, 3]
+
+    monkeypatch.undo()
+    assert second._digest.hexdigest() == data_digest(dataframe)
+
+
+def test_invalidate_after_edit(dataframe):
+    p = PrettyPandas(dataframe.iloc[:8]).total().append(dataframe.iloc[8:])
+    p.render()
+
+    p.data.iloc[0, 1] = 50
+    html = p.invalidate().render()
+    total = p.data['B'].sum()
+    assert p.frame.loc['Total', 'B'] == total
+    assert '>{:.6f}</td>'.format(total) in html
+
+
+def test_running_stats_boolean_columns():
+    df = pd.DataFrame({'b': [True, False, True, True], 'x': [1., 2, 3, 4]})
+    expected = PrettyPandas(df).total().average().min().max() \
+        ._apply_summaries().iloc[4:]
+
+    appended = (PrettyPandas(df.iloc[:2]).total().average().min().max()
+                .append(df.iloc[2:])._apply_summaries().iloc[4:])
+    chunked = (PrettyPandas.from_chunks([df.iloc[:2], df.iloc[2:]], head=1)
+               .total().average().min().max()._apply_summaries().iloc[1:])
+    for result in (appended, chunked):
+        assert list(result['b']) == [3, 0.75, False, True]
+        assert list(result['b']) == list(expected['b'])
+        assert isinstance(result.loc['Total', 'b'], (int, np.integer))
+
+
+def test_running_variance():
+    from prettypandas.streaming import ColumnStats
+
+    np.random.seed(0)
+    df = pd.DataFrame(np.random.randn(100, 3) * 4 + 2, columns=list('ABC'))
+    df.iloc[5, 1] = np.nan
+    stats = ColumnStats().update(df.iloc[:30]).update(df.iloc[30:])
+    result = stats.reduce(['var', 'std', 'mean'])
+
+    assert np.allclose(result['var'], df.var())
+    assert np.allclose(result['std'], df.std())
+    assert np.allclose(result['mean'], df.mean())
+
+
+def test_assembly_preserves_dtypes():
+    df = pd.DataFrame({'i': [1, 2, 3],
+                       'f': [1.5, 2.5, np.nan],
+                       's': list('abc')})
+    r = PrettyPandas(df).total(subset=['i', 'f']).max()._apply_summaries()
+
+    assert r['i'].dtype == np.int64
+    assert r['f'].dtype == np.float64
+    assert list(r.loc['Total', ['i', 'f']]) == [6, 4.0]
+    assert r.loc['Maximum', 's'] == 'c'
+    assert list(r.index) == [0, 1, 2, 'Total', 'Maximum']
+
+
+def test_summaries_only_reduce_numeric_columns():
+    df = pd.DataFrame({'i': [1, 2, 3], 's': list('abc'),
+                       'b': [True, False, True], 'f': [1.5, 2.5, 3.5]})
+    p = PrettyPandas(df).total().max().summary('count', title='N')
+    r = p._apply_summaries()
+
+    assert list(r.loc['Total', ['i', 'b', 'f']]) == [6, 2, 7.5]
+    assert pd.isnull(r.loc['Total', 's'])
+    assert r.loc['Maximum', 's'] == 'c'
+    assert r.loc['N', 's'] == 3
+    assert 'over 3 numeric columns' in p.explain()
+
+    # Functions and min/max are applied to every column
+    df['t'] = pd.date_range('2020-01-01', periods=3)
+    r = (PrettyPandas(df).max()
+         .summary(lambda c: c.nunique(), 'Distinct')
+         .summary(lambda c: c.iloc[-1], 'Last')._apply_summaries())
+    assert r.loc['Maximum', 't'] == pd.Timestamp('2020-01-03')
+    assert r.loc['Distinct', 's'] == 3
+    assert r.loc['Last', 's'] == 'c'
+
+    # An explicit subset is honored even for non-numeric columns
+    r = PrettyPandas(df).max(subset=['s'])._apply_summaries()
+    assert r.loc['Maximum', 's'] == 'c'
+
+
+def test_to_frame_view(dataframe):
+    p = PrettyPandas(dataframe).total().average(axis=1)
+    view = p.to_frame(view=True)
+
+    assert view.data is dataframe
+    assert list(view.rows.index) == ['Total']
+    assert list(view.cols.columns) == ['Average']
+    assert np.allclose(view.rows.loc['Total'], dataframe.sum())
+    assert np.allclose(view.cols['Average'], dataframe.mean(axis=1))
+
+
+def test_style_blanks_summary_margins_without_upcasting():
+    df = pd.DataFrame({'a': [1.0, np.nan], 'b': [3, 4]})
+    styler = PrettyPandas(df).max(subset=['b']).average(axis=1).style
+
+    assert list(styler.data.dtypes) == [np.float64, np.int64, np.float64]
+    assert np.isnan(styler.data.loc['Maximum', 'a'])
+
+    html = styler.to_html()
+    assert html.count('>nan<') == 1
+    assert html.count('></td>') == 2
+
+
+def test_subtotals():
+    index = pd.MultiIndex.from_arrays([list('aaab'), list('xxyx'), range(4)],
+                                      names=['g', 'h', 'i'])
+    df = pd.DataFrame({'v': [1, 2, 3, 4], 'w': [1.0, np.nan, 1.0, 1.0]},
+                      index=index)
+
+    p = PrettyPandas(df).subtotal(level=['g', 1]).total()
+    output = p.frame
+
+    assert list(output.index) == [
+        ('a', 'x', 0), ('a', 'x', 1), ('a', 'x', 'Subtotal'),
+        ('a', 'y', 2), ('a', 'y', 'Subtotal'), ('a', 'Subtotal', ''),
+        ('b', 'x', 3), ('b', 'x', 'Subtotal'), ('b', 'Subtotal', ''),
+        ('Total', '', ''),
+    ]
+    assert list(output['v']) == [1, 2, 3, 3, 3, 6, 4, 4, 4, 10]
+    assert output.loc[('a', 'Subtotal', ''), 'w'] == 2.0
+
+    summary_rows, _ = p._summary_masks(output)
+    assert list(np.flatnonzero(summary_rows)) == [2, 4, 5, 7, 8, 9]
+    assert p.render().count('<tr class="summary">') == 6
+
+
+def test_subtotal_of_last_level_raises():
+    df = pd.DataFrame({'v': [1, 2]},
+                      index=pd.MultiIndex.from_arrays([['a', 'b'], [1, 2]]))
+
+    with pytest.raises(ValueError):
+        PrettyPandas(df).subtotal(level=1).frame
+
+
+def test_profile_records_stages(dataframe):
+    from prettypandas.profiling import profile
+
+    p = PrettyPandas(dataframe, profile=True).total().as_percent()
+    p.render()
+    p.style.to_html()
+
+    results = p.profiler.results
+    for name in ['reduce:sum', 'summary_rows', 'assemble', 'render.format',
+                 'render.html', 'formatter[0]:NumberFormatter',
+                 'style.to_html']:
+        assert name in results.index
+    assert results.loc['materialize', 'calls'] == 2
+    assert (results['time'] >= 0).all()
+    assert (results['peak_memory'] > 0).all()
+
+    records = []
+    with profile(callback=records.append, memory=False) as profiler:
+        PrettyPandas(dataframe).summary(len, 'N').frame
+
+    assert list(profiler.results.index) == [
+        'aggregate:N', 'summary_rows', 'assemble', 'materialize']
+    assert [r['stage'] for r in records] == list(profiler.results.index)
+    assert records[0]['peak_memory'] is None
+
+
+def test_profile_without_reset_peak(dataframe, monkeypatch):
+    from prettypandas import profiling
+
+    monkeypatch.setattr(profiling, '_RESET_PEAK', False)
+    monkeypatch.delattr(profiling.tracemalloc, 'reset_peak')
+    p = PrettyPandas(dataframe, profile=True).total()
+    p.render()
+
+    results = p.profiler.results
+    assert 'summary_rows' in results.index
+    assert (results['peak_memory'] >= 0).all()
+
+
+def test_plan_is_immutable_and_hashable(dataframe):
+    base = PrettyPandas(dataframe).total()
+    first = base.total().as_percent()
+    second = base.total(subset=['A'])
+
+    assert [a.title for a in base.summary_rows] == ['Total']
+    assert [a.title for a in first._cleaned_summary_rows] == ['Total',
+                                                              'Total_1']
+    assert [a.title for a in first.summary_rows] == ['Total', 'Total']
+    assert first.plan.parent.parent is base.plan
+    assert second.plan.parent is base.plan
+
+    assert base.plan == PrettyPandas(dataframe).total().plan
+    assert hash(base.plan) == hash(PrettyPandas(dataframe).total().plan)
+    assert base.plan != first.plan
+    assert len({base.plan, first.plan, second.plan}) == 3
+
+
+def test_plan_optimizations(dataframe):
+    p = (PrettyPandas(dataframe)
+         .total()
+         .total()
+         .summary('sum', 'AB', subset=['B', 'A'])
+         .summary('sum', 'BA', subset=['A', 'B'])
+         .as_percent(subset=[])
+         .as_unit('m')
+         .as_percent(subset=['A']))
+
+    r = p.frame
+    assert list(r.index[-4:]) == ['Total', 'Total_1', 'AB', 'BA']
+    assert np.allclose(r.loc['Total_1'], dataframe.sum())
+    assert np.allclose(r.loc['BA', ['A', 'B']], dataframe[['A', 'B']].sum())
+
+    explained = p.explain()
+    assert 'reduce sum on all -> Total, Total_1' in explained
+    assert "reduce sum on ['A', 'B'] -> AB, BA" in explained
+    assert [line.split()[0] for line in explained.splitlines()[-3:]] == \
+        ['drop', 'format', 'format']
+
+    html = p.render()
+    assert '{:.2f}%'.format(dataframe['A'][0] * 100) in html
+    assert '{:.2f}m'.format(dataframe['B'][0]) in html